@@ -1,4 +1,9 @@
-from typing import List
+from collections import deque
+from itertools import islice
+from typing import Iterable, Iterator, List
+
+import numpy as np
+
 
 def load_input(testing: bool = False) -> List[str]:
     """Read the input.txt file.
@@ -10,6 +15,19 @@ def load_input(testing: bool = False) -> List[str]:
         return [line.strip('\r\n') for line in f]
 
 
+def iter_depths(testing: bool = False) -> Iterator[int]:
+    """Stream the depths from the input file.
+
+    Yields:
+        Each depth as an int.
+    """
+    with open('test-input.txt'[int(not testing) * 5:], 'r') as f:
+        for line in f:
+            line = line.strip('\r\n')
+            if line:
+                yield int(line)
+
+
 def get_depths(testing: bool = False) -> List[int]:
     """Get the depths from the input file.
 
@@ -19,17 +37,51 @@ def get_depths(testing: bool = False) -> List[int]:
     return list(map(int, load_input(testing=testing)))
 
 
+def count_increases(depths: Iterable[int], window: int = 1) -> int:
+    """Count how many times a sliding window sum increases.
+
+    Consecutive windows share all but one reading, so comparing the
+    sums is the same as comparing `depth[i]` with `depth[i - window]`.
+    Only the last `window` readings are kept, so any length of stream
+    can be processed in constant memory.
+
+    Parameters:
+        depths: Iterable of depth readings.
+        window: Number of readings in each window.
+
+    Returns:
+        Number of times the window sum was greater than the previous.
+    """
+    if window < 1:
+        raise ValueError('window must be at least 1')
+
+    depths = iter(depths)
+    previous = deque(islice(depths, window), maxlen=window)
+    count = 0
+    for depth in depths:
+        count += depth > previous[0]
+        previous.append(depth)
+    return count
+
+
+def count_increases_array(depths: np.ndarray, window: int = 1) -> int:
+    """Count how many times a sliding window sum increases.
+    This is the vectorised version of `count_increases`.
+    """
+    if window < 1:
+        raise ValueError('window must be at least 1')
+    depths = np.asarray(depths)
+    return int(np.count_nonzero(depths[window:] > depths[:-window]))
+
+
 def part_1(testing: bool = False) -> int:
     """Calculate the number of times the depth was increased."""
-    depths = get_depths(testing=testing)
-    return sum(1 for a, b in zip(depths, [depths[0] + 1] + depths) if a > b)
+    return count_increases(iter_depths(testing=testing), 1)
 
 
 def part_2(testing: bool = False) -> int:
     """Calculate the number of times the depth was increased in groups of 3."""
-    depths = get_depths(testing=testing)
-    groups = [sum(depths[i: i+3]) for i in range(len(depths) - 2)]
-    return sum(1 for a, b in zip(groups, [groups[0] + 1] + groups) if a > b)
+    return count_increases(iter_depths(testing=testing), 3)
 
 
 def test_part_1() -> None:
@@ -42,5 +94,12 @@ def test_part_2() -> None:
     assert part_2(testing=True) == 5
 
 
+def test_count_increases_array() -> None:
+    """Check the vectorised version matches the streaming version."""
+    depths = get_depths(testing=True)
+    for window in (1, 3, 5, len(depths)):
+        assert count_increases_array(np.array(depths), window) == count_increases(depths, window)
+
+
 print(f'Part 1: {part_1()}')
 print(f'Part 1: {part_2()}')
@@ -2,46 +2,69 @@
 https://adventofcode.com/2021/day/2
 """
 
-from typing import Callable, Dict, List
+from typing import Dict, List, Tuple
 
+import numpy as np
 
-def load_input(test: bool = False) -> List[str]:
-    """Read the input.txt file.
+
+# Each direction maps to the (horizontal, depth, aim, depth per aim)
+# multipliers applied to the units of a command.
+Direction = Tuple[int, int, int, int]
+
+
+def load_commands(test: bool = False) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """Parse the input file into columns.
 
     Returns:
-        List of each line as a string.
+        List of unique command names, the opcode of each line as an
+        index to the command names, and the units of each line.
+    """
+    with open('test-input.txt'[int(not test) * 5:], 'rb') as f:
+        tokens = f.read().split()
+    names, opcodes = np.unique(np.array(tokens[0::2]), return_inverse=True)
+    units = np.array(tokens[1::2], dtype=np.int64)
+    return [name.decode() for name in names], opcodes, units
+
+
+def compile_directions(directions: Dict[str, Direction], names: List[str]) -> np.ndarray:
+    """Convert a direction table into an array indexed by opcode.
+
+    Raises:
+        KeyError: If a command has no matching direction.
     """
-    with open('test-input.txt'[int(not test) * 5:], 'r') as f:
-        return [line.strip('\r\n') for line in f]
+    return np.array([directions[name] for name in names], dtype=np.int64).reshape(-1, 4)
+
 
+def move(directions: Dict[str, Direction], test: bool = False) -> int:
+    """Move the submarine according to a direction table.
 
-def move(directions: Dict[str, Callable], test: bool = False) -> int:
-    """Move the submarine according to the result of direction functions."""
-    pos = [0, 0, 0]
-    for line in load_input(test=test):
-        direction, units = line.split()
-        pos = directions[direction](pos, int(units))
-    return pos[0] * pos[1]
+    The aim at each command is the cumulative sum of the aim changes
+    before it, so all commands can be processed at once.
+    """
+    names, opcodes, units = load_commands(test=test)
+    horizontal, depth, aim, depth_per_aim = (compile_directions(directions, names)[opcodes] * units[:, None]).T
+    aim = np.cumsum(aim) - aim
+    return int(horizontal.sum()) * int(depth.sum() + (depth_per_aim * aim).sum())
 
 
 def part_1(test: bool = False) -> int:
     """Move the submarine with horizontal and depth."""
-    directions: Dict[str, Callable] = dict(
-        up=lambda pos, units: [pos[0], pos[1] - units],
-        down=lambda pos, units: [pos[0], pos[1] + units],
-        forward=lambda pos, units: [pos[0] + units, pos[1]],
-        backward=lambda pos, units: [pos[0] - units, pos[1]],
+    directions: Dict[str, Direction] = dict(
+        up=(0, -1, 0, 0),
+        down=(0, 1, 0, 0),
+        forward=(1, 0, 0, 0),
+        backward=(-1, 0, 0, 0),
     )
     return move(directions, test=test)
 
 
 def part_2(test: bool = False) -> int:
     """Move the submarine with horizontal, depth and aim."""
-    directions: Dict[str, Callable] = dict(
-        up = lambda pos, units: pos[:2] + [pos[2] - units],
-        down = lambda pos, units: pos[:2] + [pos[2] + units],
-        forward = lambda pos, units: [pos[0] + units, pos[1] + pos[2] * units, pos[2]],
-        backward=lambda pos, units: [pos[0] - units] + pos[1:],
+    directions: Dict[str, Direction] = dict(
+        up=(0, 0, -1, 0),
+        down=(0, 0, 1, 0),
+        forward=(1, 0, 0, 1),
+        backward=(-1, 0, 0, 0),
     )
     return move(directions, test=test)
 
@@ -56,5 +79,23 @@ def test_part_2() -> None:
     assert part_2(test=True) == 900
 
 
+def test_custom_directions() -> None:
+    """Check a user supplied direction table against the test input."""
+    directions: Dict[str, Direction] = dict(
+        up=(0, -1, 0, 0),
+        down=(0, 1, 0, 0),
+        forward=(2, 0, 0, 0),
+    )
+    assert move(directions, test=True) == 300
+
+    del directions['forward']
+    try:
+        move(directions, test=True)
+    except KeyError:
+        pass
+    else:
+        assert False, 'missing direction should raise KeyError'
+
+
 print(f'Part 1: {part_1()}')
 print(f'Part 2: {part_2()}')
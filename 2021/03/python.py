@@ -2,64 +2,82 @@
 https://adventofcode.com/2021/day/3
 """
 
-import operator
-from collections import Counter
-from typing import Callable, List
+import numpy as np
 
 
-def load_input(test: bool = False) -> List[str]:
-    """Read the input.txt file.
+def load_bits(test: bool = False) -> np.ndarray:
+    """Read the input.txt file as a bit matrix.
 
     Returns:
-        List of each line as a string.
+        Array of shape (readings, width) containing 0 or 1.
     """
-    with open('test-input.txt'[int(not test) * 5:], 'r') as f:
-        return [line.strip('\r\n') for line in f]
+    with open('test-input.txt'[int(not test) * 5:], 'rb') as f:
+        lines = f.read().split()
+    bits = np.frombuffer(b''.join(lines), dtype=np.uint8) - ord('0')
+    return bits.reshape(len(lines), -1)
 
 
 class BinaryList(object):
     """Class to store the list of binary numbers."""
 
     def __init__(self, test: bool = False) -> None:
-        """Initialise the class with the raw input."""
-        self.raw = load_input(test=test)
+        """Initialise the class with the input bits."""
+        self.bits = load_bits(test=test)
+
+        # Sort the numbers so that any shared prefix is a contiguous range
+        # Fold in one column at a time to avoid widening the whole bit matrix
+        values = np.zeros(len(self.bits), dtype=np.uint64)
+        for column in self.bits.T:
+            values <<= np.uint64(1)
+            values |= column
+        values.sort()
+        self.values = values
 
     def __len__(self) -> int:
         """Get the length of the binary numbers."""
-        return self.raw[0].__len__()
+        return self.bits.shape[1]
 
-    def _calculate_rate(self, op: Callable) -> int:
+    def _calculate_rate(self, most_common: bool) -> int:
         """Calculate the gamma or epsilon rate."""
-        counts = (Counter(item[i] for item in self.raw) for i in range(self.__len__()))
-        binary = (op(count['0'], count['1']) for count in counts)
-        return int(''.join(map(str, map(int, binary))), 2)
+        ones = self.bits.sum(axis=0, dtype=np.int64)
+        zeros = len(self.bits) - ones
+        binary = zeros < ones if most_common else zeros > ones
+        return int(''.join(map(str, binary.astype(int))), 2)
 
     def gamma(self) -> int:
         """Get the gamma rate."""
-        return self._calculate_rate(operator.lt)
+        return self._calculate_rate(most_common=True)
 
     def epsilon(self) -> int:
         """Get the epsilon rate."""
-        return self._calculate_rate(operator.gt)
+        return self._calculate_rate(most_common=False)
 
     def power_consumption(self) -> int:
         """Calculate the power consumption."""
         return self.gamma() * self.epsilon()
 
     def _calculate_rating(self, use_most_common: bool = True) -> int:
-        """Calculate the oxygen or co2 rating."""
-        bits = '01' if use_most_common else '10'
-
-        current = self.raw
-        for i in range(self.__len__()):
-            counter = Counter(item[i] for item in current)
-            current = [binary_num for binary_num in current
-                       if binary_num[i] == bits[1] and (counter['1'] >= counter['0'])
-                       or binary_num[i] == bits[0] and counter['0'] > counter['1']]
-            if not current:
+        """Calculate the oxygen or co2 rating.
+
+        Each bit narrows the range of sorted numbers sharing the current
+        prefix, where the numbers with that bit unset come first.
+        """
+        lo, hi = 0, len(self.values)
+        prefix = 0
+        for i in reversed(range(self.__len__())):
+            if hi - lo == 1:
                 break
-            result = current
-        return int(result[0], 2)
+            bit = 1 << i
+            split = int(np.searchsorted(self.values[lo:hi], prefix | bit)) + lo
+            zeros, ones = split - lo, hi - split
+
+            keep_ones = ones >= zeros if use_most_common else ones < zeros
+            if keep_ones and ones or not zeros:
+                lo = split
+                prefix |= bit
+            else:
+                hi = split
+        return int(self.values[lo])
 
     def oxygen(self) -> int:
         """Get the oxygen rating."""
@@ -3,7 +3,7 @@ https://adventofcode.com/2021/day/4
 """
 
 import numpy as np
-from typing import Generator, List, Optional
+from typing import Generator, Optional
 
 
 def load_input(test: bool = False) -> Generator[str, None, None]:
@@ -17,86 +17,84 @@ def load_input(test: bool = False) -> Generator[str, None, None]:
             yield line.strip('\r\n')
 
 
-class BingoBoard(object):
-    """Store the state of the bingo board."""
+class BingoGame(object):
+    """Play every bingo board at once.
 
-    def __init__(self, cells: List[List[int]]) -> None:
-        """Initialise the board from a list.
-        Assumes the cells are in a 5x5 grid.
-        """
-        self._cells = np.array(cells, dtype=int)
-        self._won = np.full(self._cells.shape, False, dtype=bool)
-        self._last_move = None
-
-    def __repr__(self) -> str:
-        """Show the board state."""
-        return self._cells.__repr__()
-
-    def won(self) -> bool:
-        """Determine if the game has been won."""
-        for i, val in enumerate(self._cells.shape):
-            if val in self._won.sum(axis=i):
-                return True
-        return False
-
-    def play(self, num) -> bool:
-        """Play a number.
-        Returns if the game was won.
+    Each cell is mapped to the turn its number is drawn, so the turn a
+    board wins is the earliest of its rows and columns to be completed,
+    and a line is complete on the latest turn of any of its cells.
+    """
+
+    def __init__(self, boards: np.ndarray, choices: np.ndarray) -> None:
+        """Initialise the game.
+
+        Parameters:
+            boards: Array of shape (boards, rows, columns).
+            choices: Numbers in the order they are drawn.
         """
-        self._last_move = num
-        where = np.where(self._cells == num)
-        self._won[where] = True
-        return self.won()
-
-    def score(self) -> int:
-        """Get the board score."""
-        where = np.where(self._won == False)
-        unmarked = np.sum(self._cells[where])
-        return unmarked * self._last_move
-
-
-def get_choices(test: bool = False) -> Generator[int, None, None]:
-    """Iterate through all the choices."""
-    raw = next(load_input(test=test))
-    for choice in raw.split(','):
-        yield int(choice)
-
-
-def get_boards(test: bool = False) -> Generator[BingoBoard, None, None]:
-    """Iterate through all the boards."""
-    cells: List[List[int]] = []
-    for line in list(load_input(test=test))[2:]:
-        if line:
-            cells.append([])
-            for c in line.split():
-                cells[-1].append(int(c))
-        elif cells:
-            yield BingoBoard(cells)
-            cells = []
-    if cells:
-        yield BingoBoard(cells)
+        self._boards = boards
+        self._choices = choices
+
+        # Map each number to the first turn it was drawn
+        # Numbers that are never drawn get a turn after the last one
+        turns = np.full(max(boards.max(), choices.max()) + 1, len(choices), dtype=np.int64)
+        numbers, first_turns = np.unique(choices, return_index=True)
+        turns[numbers] = first_turns
+        self._cell_turns = turns[boards]
+
+        rows = self._cell_turns.max(axis=2).min(axis=1)
+        columns = self._cell_turns.max(axis=1).min(axis=1)
+        self.win_turns = np.minimum(rows, columns)
+
+    def __len__(self) -> int:
+        """Get the number of boards."""
+        return len(self._boards)
+
+    def score(self, board: int) -> Optional[int]:
+        """Get the score of a board on the turn it won."""
+        turn = self.win_turns[board]
+        if turn >= len(self._choices):
+            return None
+        unmarked = self._boards[board][self._cell_turns[board] > turn].sum()
+        return int(unmarked) * int(self._choices[turn])
+
+    def first_winner(self) -> int:
+        """Get the index of the first board to win."""
+        return int(np.argmin(self.win_turns))
+
+    def last_winner(self) -> int:
+        """Get the index of the last board to win."""
+        return len(self) - 1 - int(np.argmax(self.win_turns[::-1]))
+
+
+def get_choices(test: bool = False) -> np.ndarray:
+    """Get all the choices in order."""
+    return np.array(next(load_input(test=test)).split(','), dtype=np.int64)
+
+
+def get_boards(test: bool = False, size: int = 5) -> np.ndarray:
+    """Get all the boards as a 3D array."""
+    with open('test-input.txt'[int(not test) * 5:], 'rb') as f:
+        f.readline()
+        cells = np.array(f.read().split(), dtype=np.int64)
+    return cells.reshape(-1, size, size)
+
+
+def load_game(test: bool = False) -> BingoGame:
+    """Load the choices and boards into a game."""
+    return BingoGame(get_boards(test=test), get_choices(test=test))
 
 
 def part_1(test: bool = False) -> Optional[int]:
     """Find the winning board."""
-    boards = list(get_boards(test=test))
-    for choice in get_choices(test=test):
-        for board in boards:
-            if board.play(choice):
-                return board.score()
-    return None
+    game = load_game(test=test)
+    return game.score(game.first_winner())
 
 
 def part_2(test: bool = False) -> Optional[int]:
     """Find the losing board."""
-    boards = list(get_boards(test=test))
-    for choice in get_choices(test=test):
-        for board in frozenset(boards):
-            if board.play(choice):
-                boards.remove(board)
-                if not boards:
-                    return board.score()
-    return None
+    game = load_game(test=test)
+    return game.score(game.last_winner())
 
 
 def test_part_1() -> None:
@@ -2,71 +2,176 @@
 https://adventofcode.com/2021/day/5
 """
 
+import os
+import tempfile
 import numpy as np
-from typing import Generator, List, Tuple, Union
+from typing import List, Tuple
 
 
-def load_input(test: bool = False) -> Generator[str, None, None]:
-    """Read the input.txt file.
+# Coefficients (a, b) of each line family, where a line is ax + by = k
+# Horizontal, vertical, and both diagonals
+FAMILIES: Tuple[Tuple[int, int], ...] = ((0, 1), (1, 0), (1, -1), (1, 1))
 
-    Yields:
-        Each line as a string.
+
+def parse_input(test: bool = False) -> np.ndarray:
+    """Read the input and convert to coordinates.
+
+    Returns:
+        Array of shape (lines, 4) containing x1, y1, x2, y2.
     """
-    with open('test-input.txt'[int(not test) * 5:], 'r') as f:
-        for line in f:
-            yield line.strip('\r\n')
+    with open('test-input.txt'[int(not test) * 5:], 'rb') as f:
+        data = f.read().replace(b'->', b' ').replace(b',', b' ')
+    return np.array(data.split(), dtype=np.int64).reshape(-1, 4)
 
 
-def parse_input(test: bool = False) -> Generator[Tuple[Tuple[int, int], Tuple[int, int]], None, None]:
-    """Read the input and convert to coordinates."""
-    for line in load_input(test=test):
-        start, end = line.split(' -> ')
-        x1, y1 = map(int, start.split(','))
-        x2, y2 = map(int, end.split(','))
-        yield ((x1, y1), (x2, y2))
+def classify_vents(vents: np.ndarray, diagonal: bool = True) -> np.ndarray:
+    """Get which family each vent belongs to.
 
+    Returns:
+        Index to `FAMILIES` for each vent, or -1 if not supported.
+    """
+    x1, y1, x2, y2 = vents.T
+    family = np.full(len(vents), -1, dtype=np.int64)
+    if diagonal:
+        family[(x2 - x1) == (y2 - y1)] = 2
+        family[(x2 - x1) == (y1 - y2)] = 3
+    family[x1 == x2] = 1
+    family[y1 == y2] = 0
+    return family
 
-def range_override(a: int, b: int) -> Union[List[int], range]:
-    """Get the correct range for the vent data."""
-    step = (-1, 1)[a <= b]
-    if a == b:
-        return [a]
-    return range(a, b + step, 1 if a < b else step)
+
+def rasterise(vents: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Generate every point covered by horizontal, vertical or diagonal vents.
+
+    Returns:
+        Arrays of the x and y coordinates.
+    """
+    x1, y1, x2, y2 = vents.T
+    dx, dy = np.sign(x2 - x1), np.sign(y2 - y1)
+    lengths = np.maximum(abs(x2 - x1), abs(y2 - y1)) + 1
+
+    # Distance of each point from the start of its line
+    starts = np.repeat(np.cumsum(lengths) - lengths, lengths)
+    offsets = np.arange(lengths.sum()) - starts
+
+    x = np.repeat(x1, lengths) + np.repeat(dx, lengths) * offsets
+    y = np.repeat(y1, lengths) + np.repeat(dy, lengths) * offsets
+    return x, y
 
 
 def build_vents(diagonal: bool = True, test: bool = False) -> np.ndarray:
     """Build the grid of vents."""
-    vents = list(parse_input(test=test))
-
-    # Find the area size
-    top_left = [float('inf')] * 2
-    bottom_right = [-float('inf')] * 2
-    for (x1, y1), (x2, y2) in vents:
-        top_left = [min(top_left[0], x1, x2), min(top_left[1], y1, y2)]
-        bottom_right = [max(bottom_right[0], x1, x2), max(bottom_right[1], y1, y2)]
-
-    grid = np.zeros((bottom_right[0] - top_left[0] + 1, bottom_right[1] - top_left[1] + 1), dtype=int)
-    for i, ((x1, y1), (x2, y2)) in enumerate(vents):
-        # Horizontal
-        if x1 == x2 or y1 == y2:
-            if test:
-                print(f'{i}: Horizontal ({x1, y1} -> {x2, y2})')
-            for x in range_override(x1, x2):
-                for y in range_override(y1, y2):
-                    grid[x - top_left[0], y - top_left[1]] += 1
-
-        # Diagonal
-        elif diagonal and abs(x1 - x2) == abs(y1 - y2):
-            if test:
-                print(f'{i}: Diagonal ({x1, y1} -> {x2, y2})')
-            for x, y in zip(range_override(x1, x2), range_override(y1, y2)):
-                grid[x - top_left[0], y - top_left[1]] += 1
-
-        # Unknown
-        elif test:
-            print(f'{i}: Invalid ({x1, y1} -> {x2, y2})')
-
-    return np.fliplr(np.rot90(grid, 3))
+    vents = parse_input(test=test)
+    vents = vents[classify_vents(vents, diagonal=diagonal) >= 0]
+    if not len(vents):
+        return np.zeros((0, 0), dtype=np.int64)
+    x, y = rasterise(vents)
+
+    # Count the points over the area size
+    min_x, min_y = x.min(), y.min()
+    width, height = x.max() - min_x + 1, y.max() - min_y + 1
+    counts = np.bincount((y - min_y) * width + (x - min_x), minlength=width * height)
+    return counts.reshape(height, width)
+
+
+def _line_coverage(keys: np.ndarray, starts: np.ndarray, ends: np.ndarray
+                   ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Sweep along collinear segments to find how much of each line is covered.
+
+    Parameters:
+        keys: Which line each segment is on.
+        starts: Inclusive start position of each segment along its line.
+        ends: Inclusive end position of each segment along its line.
+
+    Returns:
+        Key, start, end (exclusive) and coverage of each covered interval.
+    """
+    event_keys = np.concatenate((keys, keys))
+    event_pos = np.concatenate((starts, ends + 1))
+    event_delta = np.concatenate((np.ones_like(keys), -np.ones_like(keys)))
+    order = np.lexsort((event_pos, event_keys))
+    event_keys, event_pos = event_keys[order], event_pos[order]
+
+    # Every line starts and ends with no coverage, so a single cumsum works
+    coverage = np.cumsum(event_delta[order])[:-1]
+    valid = (event_keys[:-1] == event_keys[1:]) & (event_pos[:-1] < event_pos[1:]) & (coverage > 0)
+    return event_keys[:-1][valid], event_pos[:-1][valid], event_pos[1:][valid], coverage[valid]
+
+
+def count_overlaps_sparse(vents: np.ndarray, diagonal: bool = True, block_size: int = 1024) -> int:
+    """Count the points where at least two vents overlap, without a grid.
+
+    Collinear overlaps are found by sweeping each line, and crossings
+    between lines of different directions are checked in blocks. The
+    memory used depends on the number of vents and not the area.
+
+    Parameters:
+        vents: Array of shape (lines, 4) containing x1, y1, x2, y2.
+        diagonal: If diagonal vents should be included.
+        block_size: How many lines to check crossings for at once.
+    """
+    families = classify_vents(vents, diagonal=diagonal)
+
+    count = 0
+    lines: List[Tuple[int, np.ndarray, np.ndarray, np.ndarray]] = []
+    overlaps: List[Tuple[int, np.ndarray, np.ndarray, np.ndarray]] = []
+    for family, (a, b) in enumerate(FAMILIES):
+        x1, y1, x2, y2 = vents[families == family].T
+        if not len(x1):
+            continue
+
+        # Vertical lines are measured along y, everything else along x
+        pos1, pos2 = (y1, y2) if family == 1 else (x1, x2)
+        keys, starts, ends, coverage = _line_coverage(
+            a * x1 + b * y1, np.minimum(pos1, pos2), np.maximum(pos1, pos2))
+        multiple = coverage > 1
+        count += int((ends[multiple] - starts[multiple]).sum())
+
+        # Merge touching intervals to get the unique covered ranges
+        new_range = np.ones(len(keys), dtype=bool)
+        new_range[1:] = (keys[1:] != keys[:-1]) | (starts[1:] != ends[:-1])
+        range_ends = np.append(ends[np.flatnonzero(new_range)[1:] - 1], ends[-1])
+        lines.append((family, keys[new_range], starts[new_range], range_ends))
+        overlaps.append((family, keys[multiple], starts[multiple], ends[multiple]))
+
+    # Find the crossing points between different directions
+    crossings = []
+    for i, (family1, keys1, starts1, ends1) in enumerate(lines):
+        a1, b1 = FAMILIES[family1]
+        for family2, keys2, starts2, ends2 in lines[i + 1:]:
+            a2, b2 = FAMILIES[family2]
+            det = a1 * b2 - a2 * b1
+            for block in range(0, len(keys1), block_size):
+                k1 = keys1[block:block + block_size, None]
+                s1 = starts1[block:block + block_size, None]
+                e1 = ends1[block:block + block_size, None]
+                x_det = k1 * b2 - keys2 * b1
+                y_det = a1 * keys2 - a2 * k1
+                x, y = x_det // det, y_det // det
+                pos1 = y if family1 == 1 else x
+                pos2 = y if family2 == 1 else x
+                valid = ((x_det % det == 0) & (y_det % det == 0)
+                         & (s1 <= pos1) & (pos1 < e1) & (starts2 <= pos2) & (pos2 < ends2))
+                crossings.append(np.stack((x[valid], y[valid])))
+    if not crossings:
+        return count
+    x, y = np.unique(np.concatenate(crossings, axis=1), axis=1)
+
+    # Find how many times each crossing has been counted as a collinear overlap
+    counted = np.zeros(len(x), dtype=np.int64)
+    for family, keys, starts, ends in overlaps:
+        a, b = FAMILIES[family]
+        point_keys = a * x + b * y
+        point_pos = y if family == 1 else x
+        if not len(keys):
+            continue
+
+        # The intervals are sorted by key then start, so find the last one starting before each point
+        candidates = np.searchsorted(keys * (1 << 32) + starts, point_keys * (1 << 32) + point_pos, 'right') - 1
+        candidates = np.maximum(candidates, 0)
+        counted += ((keys[candidates] == point_keys) & (starts[candidates] <= point_pos)
+                    & (point_pos < ends[candidates]))
+    return count + int(np.count_nonzero(counted == 0)) - int((counted[counted > 1] - 1).sum())
 
 
 def part_1(test: bool = False) -> int:
@@ -91,6 +196,27 @@ def test_part_2() -> None:
     assert part_2(test=True) == 12
 
 
+def test_part_1_diagonal_only() -> None:
+    """Check part 1 ignores an input with only diagonal vents."""
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as path:
+        with open(os.path.join(path, 'test-input.txt'), 'w') as f:
+            f.write('0,0 -> 3,3\n5,0 -> 2,3\n')
+        os.chdir(path)
+        try:
+            assert part_1(test=True) == 0
+            assert part_2(test=True) == 0
+        finally:
+            os.chdir(cwd)
+
+
+def test_count_overlaps_sparse() -> None:
+    """Check the sparse mode matches the grid."""
+    vents = parse_input(test=True)
+    assert count_overlaps_sparse(vents, diagonal=False) == 5
+    assert count_overlaps_sparse(vents, diagonal=True) == 12
+
+
 if __name__ == '__main__':
     print(f'Part 1: {part_1()}')
     print(f'Part 2: {part_2()}')
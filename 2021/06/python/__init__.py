@@ -2,8 +2,17 @@
 https://adventofcode.com/2021/day/6
 """
 
-from collections import Counter, defaultdict
-from typing import Counter as CounterType, Dict, Generator, Union
+from collections import Counter
+from typing import Counter as CounterType, Generator, Iterable, List, Optional, Sequence
+
+
+# Number of days between each fish spawning
+CYCLE = 7
+
+# Number of possible ages, including the extra days for a new fish
+AGES = 9
+
+Matrix = List[List[int]]
 
 
 def load_input(test: bool = False) -> Generator[str, None, None]:
@@ -22,19 +31,73 @@ def get_fish(test: bool = False) -> CounterType[int]:
     return Counter(map(int, next(load_input(test=test)).split(',')))
 
 
+def get_ages(test: bool = False) -> List[int]:
+    """Get the number of fish at each age."""
+    fish = get_fish(test=test)
+    return [fish[age] for age in range(AGES)]
+
+
 def spawn_fish(days: int = 80, test: bool = False) -> int:
-    """Count the number of fish after a number of days."""
-    fish_counts: Union[Dict[int, int], CounterType[int]] = get_fish(test=test)
-    for _ in range(days):
-        fish_next: Dict[int, int] = defaultdict(int)
-        for i, val in fish_counts.items():
-            if i:
-                fish_next[i - 1] += val
-            else:
-                fish_next[6] += val
-                fish_next[8] += val
-        fish_counts = fish_next
-    return sum(fish_counts.values())
+    """Count the number of fish after a number of days.
+
+    The ages are stored in a ring, so instead of shifting every age down
+    each day, the start of the ring moves forward. The fish at age 0
+    stay where they are to become the new fish at age 8, and are added
+    to the fish at age 6.
+    """
+    ages = get_ages(test=test)
+    for day in range(days):
+        ages[(day + CYCLE) % AGES] += ages[day % AGES]
+    return sum(ages)
+
+
+def transition_matrix() -> Matrix:
+    """Build the matrix to convert the fish ages to the next day."""
+    matrix = [[0] * AGES for _ in range(AGES)]
+    for age in range(1, AGES):
+        matrix[age - 1][age] = 1
+    matrix[CYCLE - 1][0] = 1
+    matrix[AGES - 1][0] = 1
+    return matrix
+
+
+def _multiply(a: Matrix, b: Matrix, modulo: Optional[int] = None) -> Matrix:
+    """Multiply two matrices."""
+    result = [[sum(x * y for x, y in zip(row, col)) for col in zip(*b)] for row in a]
+    if modulo is not None:
+        result = [[value % modulo for value in row] for row in result]
+    return result
+
+
+def forecast_fish(days: Iterable[int], ages: Sequence[int], modulo: Optional[int] = None) -> List[int]:
+    """Count the number of fish after any number of days.
+
+    The transition matrix is squared repeatedly, so each day count only
+    needs one matrix-vector product per bit, and the squares are shared
+    between every day count in the batch.
+
+    Parameters:
+        days: Day counts to forecast.
+        ages: Number of fish at each age.
+        modulo: Return the results modulo this number.
+
+    Returns:
+        Number of fish for each day count.
+    """
+    days = list(days)
+    powers = [transition_matrix()]
+    while 1 << len(powers) <= max(days, default=0):
+        powers.append(_multiply(powers[-1], powers[-1], modulo))
+
+    results = []
+    for day_count in days:
+        vector = [[count] for count in ages]
+        for bit, power in enumerate(powers):
+            if day_count >> bit & 1:
+                vector = _multiply(power, vector, modulo)
+        total = sum(row[0] for row in vector)
+        results.append(total if modulo is None else total % modulo)
+    return results
 
 
 def part_1(days: int = 80, test: bool = False) -> int:
@@ -58,6 +121,13 @@ def test_part_2() -> None:
     assert part_2(test=True) == 26984457539
 
 
+def test_forecast_fish() -> None:
+    """Check the forecast matches the simulation."""
+    ages = get_ages(test=True)
+    assert forecast_fish([0, 18, 80, 256], ages) == [5, 26, 5934, 26984457539]
+    assert forecast_fish([256], ages, modulo=1000000007) == [26984457539 % 1000000007]
+
+
 if __name__ == '__main__':
     test_part_1()
     print(f'Part 1: {part_1()}')
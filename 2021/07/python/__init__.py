@@ -2,7 +2,9 @@
 https://adventofcode.com/2021/day/7
 """
 
-from typing import Generator
+import math
+import numpy as np
+from typing import Callable, Generator, Iterable
 
 
 def load_input(test: bool = False) -> Generator[str, None, None]:
@@ -21,18 +23,96 @@ def get_positions(test: bool=False) -> Generator[int, None, None]:
     yield from map(int, next(load_input(test=test)).split(','))
 
 
+class CrabSwarm(object):
+    """Find the cheapest position to align the crabs.
+
+    The crabs are counted at each position, and prefix sums of the
+    counts and positions allow the total cost of any position to be
+    found without checking every crab.
+    """
+
+    def __init__(self, positions: Iterable[int]) -> None:
+        """Count the crabs at each position."""
+        positions = np.fromiter(positions, dtype=np.int64)
+        self.min = int(positions.min())
+        self.max = int(positions.max())
+        self.counts = np.bincount(positions - self.min)
+        self.values = np.arange(self.min, self.max + 1, dtype=np.int64)
+
+        # Prefix sums of the crabs below each position
+        self._count_below = np.concatenate(([0], np.cumsum(self.counts)))
+        self._sum_below = np.concatenate(([0], np.cumsum(self.counts * self.values)))
+        self.total = int(self._count_below[-1])
+        self.sum = int(self._sum_below[-1])
+        self.sum_squares = int(np.dot(self.counts, self.values * self.values))
+
+    def _index(self, position: int) -> int:
+        """Get the prefix sum index of the crabs below a position."""
+        return min(max(position - self.min, 0), len(self.counts))
+
+    def linear_cost(self, position: int) -> int:
+        """Get the fuel required when each step costs 1."""
+        i = self._index(position)
+        count_below, sum_below = int(self._count_below[i]), int(self._sum_below[i])
+        below = position * count_below - sum_below
+        above = (self.sum - sum_below) - position * (self.total - count_below)
+        return below + above
+
+    def triangular_cost(self, position: int) -> int:
+        """Get the fuel required when each step costs 1 more than the last.
+        The cost of each crab is (d^2 + d) / 2 for a distance of d.
+        """
+        squares = self.sum_squares - 2 * position * self.sum + self.total * position * position
+        return (squares + self.linear_cost(position)) // 2
+
+    def linear_position(self) -> int:
+        """Get the best position for a linear cost.
+        This is the median of the crabs.
+        """
+        median = (self.total + 1) // 2
+        return self.min + int(np.searchsorted(self._count_below, median)) - 1
+
+    def triangular_position(self) -> int:
+        """Get the best position for a triangular cost.
+        This is always within 0.5 of the mean.
+        """
+        mean = self.sum / self.total
+        candidates = range(math.floor(mean - 0.5), math.ceil(mean + 0.5) + 1)
+        return min(candidates, key=self.triangular_cost)
+
+    def cost(self, position: int, fn: Callable[[np.ndarray], np.ndarray]) -> int:
+        """Get the total cost of a position for any cost function.
+
+        Parameters:
+            position: Position to move every crab to.
+            fn: Vectorised function to get the cost of each distance.
+        """
+        return int(np.dot(self.counts, fn(np.abs(self.values - position))))
+
+    def best_position(self, fn: Callable[[np.ndarray], np.ndarray]) -> int:
+        """Find the best position for a convex cost function.
+        The total cost is also convex, so a ternary search can be used.
+        """
+        lo, hi = self.min, self.max
+        while hi - lo > 2:
+            third = (hi - lo) // 3
+            if self.cost(lo + third, fn) <= self.cost(hi - third, fn):
+                hi = hi - third
+            else:
+                lo = lo + third
+        return min(range(lo, hi + 1), key=lambda position: self.cost(position, fn))
+
+
 def part_1(test: bool = False) -> int:
     """Get the linear shortest distance."""
-    positions = list(get_positions(test=test))
-    fn = lambda val: sum(abs(pos - val) for pos in positions)
-    return min(map(fn, range(min(positions), max(positions) + 1)))
+    crabs = CrabSwarm(get_positions(test=test))
+    return crabs.linear_cost(crabs.linear_position())
 
 
 def part_2(test: bool = False) -> int:
     """Get the triangular shortest distance."""
-    positions = list(get_positions(test=test))
-    fn = lambda val: sum(n * (n + 1) // 2 for n in (abs(pos - val) for pos in positions))
-    return min(map(fn, range(min(positions), max(positions) + 1)))
+    crabs = CrabSwarm(get_positions(test=test))
+    return crabs.triangular_cost(crabs.triangular_position())
 
 
 def test_part_1() -> None:
@@ -45,6 +125,13 @@ def test_part_2() -> None:
     assert part_2(test=True) == 168
 
 
+def test_best_position() -> None:
+    """Check the ternary search against the known costs."""
+    crabs = CrabSwarm(get_positions(test=True))
+    assert crabs.cost(crabs.best_position(lambda n: n), lambda n: n) == 37
+    assert crabs.cost(crabs.best_position(lambda n: n * (n + 1) // 2), lambda n: n * (n + 1) // 2) == 168
+
+
 if __name__ == '__main__':
     test_part_1()
     print(f'Part 1: {part_1()}')
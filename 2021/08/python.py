@@ -2,9 +2,29 @@
 https://adventofcode.com/2021/day/7
 """
 
+import numpy as np
 from typing import Generator, List, Tuple
 
 
+# Segments used by each digit when wired correctly
+DIGITS = ('abcefg', 'cf', 'acdeg', 'acdfg', 'bcdf', 'abdfg', 'abdefg', 'acf', 'abcdefg', 'abcdfg')
+
+
+def _build_signatures() -> np.ndarray:
+    """Map each digit signature to the digit.
+    A signature is the sum of how many digits use each of its segments.
+    """
+    frequencies = {segment: ''.join(DIGITS).count(segment) for segment in 'abcdefg'}
+    table = np.full(7 * len(DIGITS) + 1, -1, dtype=np.int64)
+    for digit, segments in enumerate(DIGITS):
+        table[sum(frequencies[segment] for segment in segments)] = digit
+    return table
+
+
+# Lookup table of digit signatures
+SIGNATURES = _build_signatures()
+
+
 def load_input(test: bool = False) -> Generator[str, None, None]:
     """Read the input.txt file.
 
@@ -32,57 +52,40 @@ def part_1(test: bool = False):
     return count
 
 
+def load_masks(test: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+    """Read the whole input as 7-bit segment masks.
+
+    Returns:
+        Arrays of the pattern masks with shape (lines, 10) and the
+        output masks with shape (lines, 4).
+    """
+    with open('test-input.txt'[int(not test) * 5:], 'rb') as f:
+        tokens = np.array(f.read().split(), dtype='S7').reshape(-1, 15)
+    chars = np.delete(tokens, 10, axis=1).view(np.uint8).reshape(len(tokens), 14, 7).astype(np.int64)
+    masks = np.where(chars, np.left_shift(1, chars - ord('a')), 0).sum(axis=2)
+    return masks[:, :10], masks[:, 10:]
+
+
+def decode(patterns: np.ndarray, outputs: np.ndarray) -> np.ndarray:
+    """Decode the output digits from the pattern masks.
+
+    Each wire is counted across the ten patterns, which is the same
+    whichever way the wires are connected. Adding up the counts for
+    every wire in a digit then gives a unique signature.
+
+    Returns:
+        Array of each output value.
+    """
+    bits = (patterns[:, :, None] >> np.arange(7)) & 1
+    frequencies = bits.sum(axis=1)
+    output_bits = (outputs[:, :, None] >> np.arange(7)) & 1
+    signatures = (output_bits * frequencies[:, None, :]).sum(axis=2)
+    return SIGNATURES[signatures] @ np.array([1000, 100, 10, 1])
+
+
 def part_2(test: bool = False) -> int:
     """Find the sum of the outputs."""
-    outputs = []
-    for patterns, output in parse_input(test=test):
-        known = {}
-        potential_6 = []
-        for pattern in map(set, patterns):
-            if len(pattern) == 2:
-                known[1] = pattern
-            elif len(pattern) == 3:
-                known[7] = pattern
-            elif len(pattern) == 4:
-                known[4] = pattern
-            elif len(pattern) == 6:  # 0, 6, 9
-                potential_6.append(pattern)
-            elif len(pattern) == 7:
-                known[8] = pattern
-
-        # Initial known mapping
-        a = known[7] - known[1]
-        b_d = known[4] - known[1]
-        e_g = known[8] - known[4] - known[7]
-
-        for pattern in potential_6:
-            # Find the mapping of e and g from 9
-            if e_g - pattern:
-                e = e_g - pattern
-                g = e_g - e
-                known[9] = known[4] | a | g
-
-            # Find the mapping of c from 6
-            elif known[7] - pattern:
-                known[6] = pattern
-                c = known[8] - pattern
-
-            # Find the mapping of b and d from 0
-            else:
-                known[0] = pattern
-                d = known[4] - known[0]
-                b = b_d - d
-
-        # Calculate the remaining mapping
-        known[2] = a | c | d | e | g
-        f = known[8] - known[2] - b
-        known[3] = a | c | d | f | g
-        known[5] = a | b | d | f | g
-
-        # Use the mapping on the output
-        digits = [next(k for k, v in known.items() if v == val) for val in map(set, output)]
-        outputs.append(int(''.join(map(str, digits))))
-    return sum(outputs)
+    return int(decode(*load_masks(test=test)).sum())
 
 
 def test_part_1() -> None:
@@ -4,8 +4,7 @@ https://adventofcode.com/2021/day/9
 
 import math
 import numpy as np
-from functools import partial
-from typing import Generator, List, Tuple
+from typing import Generator, Tuple
 
 
 def load_input(test: bool = False) -> Generator[str, None, None]:
@@ -25,46 +24,60 @@ def generate_matrix(test: bool = False) -> np.ndarray:
     return np.array(lines, dtype=int)
 
 
-def get_adjacent(matrix, coordinate: Tuple[int, int]) -> Generator[Tuple[int, int], None, None]:
-    """Get the valid adjancent coordinates to a coordinate."""
-    range_x = range(0, matrix.shape[0])
-    range_y = range(0, matrix.shape[1])
-    for x, y in ((1, 0), (0, 1), (-1, 0), (0, -1)):
-        if coordinate[0] + x in range_x and coordinate[1] + y in range_y:
-            yield (coordinate[0] + x, coordinate[1] + y)
-
-
-def find_if_low(matrix: np.ndarray, coordinate: Tuple[int, int]) -> bool:
-    """Determine if a point is a low point."""
-    for adjancent in get_adjacent(matrix, coordinate):
-        if matrix[adjancent] <= matrix[coordinate]:
-            return False
-    return True
-
-
-def find_low(matrix: np.ndarray) -> Generator[List[int], None, None]:
+def find_low(matrix: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
     """Find the low points of a matrix.
     A low point is surrounded by higher points in the x and y directions.
+
+    Returns:
+        Row and column indices of each low point.
     """
-    yield from filter(partial(find_if_low, matrix), np.ndindex(matrix.shape))
+    padded = np.pad(matrix, 1, constant_values=matrix.max() + 1)
+    centre = padded[1:-1, 1:-1]
+    low = ((centre < padded[:-2, 1:-1]) & (centre < padded[2:, 1:-1])
+           & (centre < padded[1:-1, :-2]) & (centre < padded[1:-1, 2:]))
+    rows, columns = np.nonzero(low)
+    return rows, columns
 
 
-def flood_fill(matrix: np.ndarray, coordinate: Tuple[int, int], fill=None):
-    """Fill in the matrix until values of 9 are found."""
-    if fill is None:
-        fill = np.zeros(matrix.shape, dtype=bool)
+def label_basins(matrix: np.ndarray) -> np.ndarray:
+    """Label each connected area that is not a height of 9.
 
-    # Coordinate already visited
-    if fill[coordinate]:
-        return fill
+    This is a union-find over the whole matrix at once. Every pair of
+    connected cells links the larger root to the smaller one, then each
+    cell jumps to its root, until no pairs are left to link.
 
-    # Recursively fill in adjancent coordinates
-    fill[coordinate] = True
-    for adjancent in get_adjacent(matrix, coordinate):
-        if matrix[adjancent] == 9:
-            continue
-        flood_fill(matrix, adjancent, fill)
-    return fill
+    Returns:
+        Flat array of the basin root of each cell, or -1 for heights of 9.
+    """
+    height, width = matrix.shape
+    basin = (matrix != 9).ravel()
+    index = np.arange(basin.size, dtype=np.int64)
+
+    # Only the first cell of each connected pair needs storing
+    right = index[:-1][basin[:-1] & basin[1:] & (index[:-1] % width != width - 1)]
+    down = index[:-width][basin[:-width] & basin[width:]]
+    first = np.concatenate((right, down))
+    second = np.concatenate((right + 1, down + width))
+
+    labels = index.copy()
+    while True:
+        root_first, root_second = labels[first], labels[second]
+        unlinked = root_first != root_second
+        if not unlinked.any():
+            break
+        first, second = first[unlinked], second[unlinked]
+        root_first, root_second = root_first[unlinked], root_second[unlinked]
+        np.minimum.at(labels, np.maximum(root_first, root_second), np.minimum(root_first, root_second))
+
+        # Compress the paths to the roots
+        while True:
+            parents = labels[labels]
+            if np.array_equal(parents, labels):
+                break
+            labels = parents
+
+    labels[~basin] = -1
+    return labels
 
 
 def part_1(test: bool = False) -> int:
@@ -72,17 +85,17 @@ def part_1(test: bool = False) -> int:
     This is calculated by the height of the lowest point + 1.
     """
     matrix = generate_matrix(test=test)
-    return sum(matrix[coordinate] + 1 for coordinate in find_low(matrix))
+    low = matrix[find_low(matrix)]
+    return int(low.sum() + low.size)
 
 
 def part_2(test: bool = False) -> int:
     """Find the 3 largest basins.
     A basin is surrounded by a height of 9.
     """
-    matrix = generate_matrix(test=test)
-    basin_sizes = map(np.sum, map(partial(flood_fill, matrix), find_low(matrix)))
-    largets_basins = list(sorted(basin_sizes))[-3:]
-    return math.prod(largets_basins)
+    labels = label_basins(generate_matrix(test=test))
+    basin_sizes = np.bincount(labels[labels >= 0])
+    return math.prod(map(int, np.sort(basin_sizes)[-3:]))
 
 
 def test_part_1() -> None:
@@ -2,75 +2,112 @@
 https://adventofcode.com/2021/day/10
 """
 
-from functools import reduce
-from typing import Dict, Generator, List, Tuple
+import random
+from typing import Generator, Iterable, List, Tuple
 
 
 # Scoring mapping for part 1
 PART_1_SCORING = {')': 3, ']': 57, '}': 1197, '>': 25137}
 
-# Scoring mapping for part 2
-PART_2_SCORING = {')': 1, ']': 2, '}': 3, '>': 4}
+# Convert each bracket to a token
+# Opening brackets are 1 to 4, closing brackets are 5 to 8, and anything else is 0
+OPENING = b'([{<'
+CLOSING = b')]}>'
+TOKENS = bytes(1 + (OPENING + CLOSING).index(byte) if byte in OPENING + CLOSING else 0 for byte in range(256))
 
-# Mapping to find the correct closing replacement
-CLOSING_REPLACE: Dict[str, str] = dict(('<>', '{}', '()', '[]'))
+# Part 1 score of each closing token
+CORRUPTED_SCORES = (0, 0, 0, 0, 0) + tuple(PART_1_SCORING[chr(c)] for c in CLOSING)
 
 
-def load_input(test: bool = False) -> Generator[str, None, None]:
+def load_input(test: bool = False) -> Generator[bytes, None, None]:
     """Read the input.txt file.
 
     Yields:
-        Each line as a string.
+        Each line as bytes.
     """
-    with open('test-input.txt'[int(not test) * 5:], 'r') as f:
-        for line in f:
-            yield line.strip('\r\n')
+    with open('test-input.txt'[int(not test) * 5:], 'rb') as f:
+        yield from f
 
 
-def sort_lines(test: bool = False) -> Tuple[List[str], List[str]]:
-    """Get "corrupted" and "incomplete" line data.
+def score_line(line: bytes) -> Tuple[int, int]:
+    """Score a line in a single pass.
+
+    The tokens for the opening brackets match their part 2 score, so
+    the stack can be used for the completion score without converting
+    it back to the closing brackets.
 
     Returns:
-        List of corrupted characters, and a list of incomplete chunks.
+        The corrupted score, and the completion score.
+        Only one of these will be set.
     """
-    corrupted = []
-    incomplete = []
-    for line in load_input(test=test):
-        stack = []
-
-        # Corrupted
-        for x in reversed(line):
-            if x in '>])}':
-                stack.append(x)
-            elif x in '<[({' and stack:
-                invalid = stack.pop()
-                if CLOSING_REPLACE[x] != invalid:
-                    corrupted.append(invalid)
-                    break
-
-        # Incomplete
-        else:
-            for x in line:
-                if x in '<[({':
-                    stack.append(x)
-                elif x in '>])}':
-                    stack.pop()
-            incomplete.append(''.join(map(CLOSING_REPLACE.get, reversed(stack))))
+    stack = []
+    for token in line.translate(TOKENS):
+        if not token:
+            continue
+        if token < 5:
+            stack.append(token)
+        elif not stack or stack.pop() != token - 4:
+            return CORRUPTED_SCORES[token], 0
+
+    score = 0
+    for token in reversed(stack):
+        score = score * 5 + token
+    return 0, score
+
 
+def score_lines(lines: Iterable[bytes]) -> Tuple[int, List[int]]:
+    """Score a stream of lines, such as a binary file or `sys.stdin.buffer`.
+
+    Returns:
+        Total corrupted score, and the completion score of each
+        incomplete line.
+    """
+    corrupted = 0
+    incomplete = []
+    for line in lines:
+        corrupted_score, completion_score = score_line(line)
+        corrupted += corrupted_score
+        if completion_score:
+            incomplete.append(completion_score)
     return corrupted, incomplete
 
 
+def select(values: List[int], k: int) -> int:
+    """Find the kth smallest value without sorting.
+    The list will be reordered.
+    """
+    lo, hi = 0, len(values) - 1
+    while lo < hi:
+        pivot = values[random.randint(lo, hi)]
+        i, j = lo, hi
+        while i <= j:
+            while values[i] < pivot:
+                i += 1
+            while values[j] > pivot:
+                j -= 1
+            if i <= j:
+                values[i], values[j] = values[j], values[i]
+                i += 1
+                j -= 1
+        if k <= j:
+            hi = j
+        elif k >= i:
+            lo = i
+        else:
+            break
+    return values[k]
+
+
 def part_1(test: bool = False) -> int:
     """Get the total syntax error score."""
-    corrupted, incomplete = sort_lines(test=test)
-    return sum(map(PART_1_SCORING.get, corrupted))
+    corrupted, incomplete = score_lines(load_input(test=test))
+    return corrupted
 
 
 def part_2(test: bool = False) -> int:
     """Get the incomplete line score winner."""
-    corrupted, incomplete = sort_lines(test=test)
-    scores = [reduce(lambda a, b: a * 5 + PART_2_SCORING[b], x, 0) for x in incomplete]
-    return list(sorted(scores))[len(scores) // 2]
+    corrupted, incomplete = score_lines(load_input(test=test))
+    return select(incomplete, len(incomplete) // 2)
 
 
 def test_part_1() -> None:
@@ -83,6 +120,19 @@ def test_part_2() -> None:
     assert part_2(test=True) == 288957
 
 
+def test_score_line_control_bytes() -> None:
+    """Check bytes other than brackets are ignored."""
+    assert score_line(b'(\x05') == (0, 1)
+    assert score_line(b'(\x01]') == (57, 0)
+
+
+def test_select() -> None:
+    """Check selection matches sorting."""
+    values = [random.randint(0, 20) for _ in range(101)]
+    for k in (0, 50, 100):
+        assert select(list(values), k) == sorted(values)[k]
+
+
 if __name__ == '__main__':
     test_part_1()
     print(f'Part 1: {part_1()}')
@@ -1,7 +1,5 @@
-import math
 import numpy as np
-from functools import partial
-from typing import Generator, List, Tuple
+from typing import Generator
 
 
 def load_input(test: bool = False) -> Generator[str, None, None]:
@@ -21,41 +19,56 @@ def generate_matrix(test: bool = False) -> np.ndarray:
     return np.array(lines, dtype=int)
 
 
-def get_adjacent(shape: Tuple[int, int], coordinate: Tuple[int, int],
-                 ) -> Generator[Tuple[int, int], None, None]:
-    """Get the valid adjancent coordinates to a coordinate."""
-    for x, y in ((i, j) for i in (-1, 0, 1) for j in (-1, 0, 1) if i or j):
-        if 0 <= coordinate[0] + x < shape[0] and 0 <= coordinate[1] + y < shape[1]:
-            yield (coordinate[0] + x, coordinate[1] + y)
+def count_neighbours(grid: np.ndarray) -> np.ndarray:
+    """Count how many of the 8 neighbours of each cell are set.
+    Only the last two dimensions are used, so grids can be batched.
+    """
+    padded = np.pad(grid.astype(np.int64), [(0, 0)] * (grid.ndim - 2) + [(1, 1), (1, 1)])
+    height, width = grid.shape[-2:]
+    total = np.zeros(grid.shape, dtype=np.int64)
+    for y in range(3):
+        for x in range(3):
+            if y != 1 or x != 1:
+                total += padded[..., y:y + height, x:x + width]
+    return total
 
 
 def step(octopuses: np.ndarray) -> np.ndarray:
-    """Charge each octopus by 1, and flash if it reaches 9.
-    Adjenct octopuses will gain energy from a flash.
+    """Charge each octopus by 1, and flash if it goes above 9.
+    Adjacent octopuses will gain energy from a flash.
     If a flash occurs, then the octopus cannot gain energy again.
 
+    Each pass flashes every new octopus at once, and only continues
+    while new flashes appear. Stacked grids are stepped together.
+
     Returns:
         Boolean array of where the flashes occurred.
     """
+    octopuses += 1
     flashed = np.zeros(octopuses.shape, dtype=bool)
+    flashing = octopuses > 9
+    while flashing.any():
+        flashed |= flashing
+        octopuses += count_neighbours(flashing)
+        flashing = (octopuses > 9) & ~flashed
 
-    while np.any(octopuses >= 9):
-        for x, y in np.ndindex(octopuses.shape):
-            if octopuses[x, y] >= 9:
-                octopuses[x, y] = 0
-                flashed[x, y] = True
-                rows, cols = zip(*get_adjacent(octopuses.shape, (x, y)))
-                octopuses[rows, cols] += 1
-
-    octopuses += 1
     octopuses[flashed] = 0
     return flashed
 
 
+def simulate(octopuses: np.ndarray, steps: int) -> np.ndarray:
+    """Run multiple steps.
+
+    Returns:
+        Number of flashes per step for each grid.
+    """
+    return np.array([step(octopuses).sum(axis=(-2, -1)) for _ in range(steps)])
+
+
 def part_1(test: bool = False) -> int:
     """Find the total number of flashes in 100 steps."""
     octopuses = generate_matrix(test=test)
-    return sum(np.sum(step(octopuses)) for i in range(100))
+    return int(simulate(octopuses, 100).sum())
 
 
 def part_2(test: bool = False) -> int:
@@ -77,6 +90,13 @@ def test_part_2() -> None:
     assert part_2(test=True) == 195
 
 
+def test_simulate_batch() -> None:
+    """Check stacked grids are simulated independently."""
+    octopuses = generate_matrix(test=True)
+    batch = np.stack((octopuses, np.zeros_like(octopuses)))
+    assert simulate(batch, 100).sum(axis=0).tolist() == [1656, 1000]
+
+
 if __name__ == '__main__':
     test_part_1()
     print(f'Part 1: {part_1()}')
@@ -5,7 +5,8 @@ https://adventofcode.com/2021/day/12
 from __future__ import annotations
 
 from collections import defaultdict
-from typing import Any, Dict, Generator, List, Optional, Set, Tuple, Union
+from functools import lru_cache
+from typing import Any, Dict, Generator, Iterator, List, Optional, Set, Tuple, Union
 from string import ascii_lowercase
 
 
@@ -69,7 +70,7 @@ class Cave(object):
         return f'{type(self).__name__}({self.code}, test_case={self.test_case})'
 
     def __hash__(self) -> int:
-        return hash(self.__repr__())
+        return hash((self.code, self.test_case))
 
     def __eq__(self, other: Any) -> bool:
         if isinstance(other, Cave):
@@ -99,64 +100,180 @@ class Cave(object):
         return self._connections(self.test_case)[self]
 
     def find_paths(self, target: Union[Cave, str],
-                   visit_twice: Optional[Union[Cave, str]] = None) -> List[List[Cave]]:
+                   visit_twice: Optional[Union[Cave, str, bool]] = None) -> List[List[Cave]]:
         """Find paths to the target."""
         target = Cave(target, self.test_case)
         return find_paths(node=self, target=target, visit_twice=visit_twice)
 
+    def iter_paths(self, target: Union[Cave, str],
+                   visit_twice: Optional[Union[Cave, str, bool]] = None) -> Iterator[CavePath]:
+        """Iterate over the paths to the target."""
+        target = Cave(target, self.test_case)
+        return iter_paths(node=self, target=target, visit_twice=visit_twice)
+
+
+class CavePath(object):
+    """Store a path as a link to the path before it.
+    Paths that share a prefix share the same links.
+    """
+
+    __slots__ = ('cave', 'previous', 'length')
+
+    def __init__(self, cave: Cave, previous: Optional[CavePath] = None) -> None:
+        """Extend a path with a new cave."""
+        self.cave: Cave = cave
+        self.previous: Optional[CavePath] = previous
+        self.length: int = 1 if previous is None else previous.length + 1
+
+    def __repr__(self) -> str:
+        return ','.join(map(str, self))
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __iter__(self) -> Iterator[Cave]:
+        """Iterate through the caves from the start of the path."""
+        caves: List[Cave] = []
+        path: Optional[CavePath] = self
+        while path is not None:
+            caves.append(path.cave)
+            path = path.previous
+        return reversed(caves)
+
 
-def find_paths(node: Cave, target: Union[Cave, str], visit_twice: Optional[Union[Cave, str]] = None,
-               _path: Optional[List[Cave]] = None, _visited: Optional[Set[Cave]] = None) -> List[List[Cave]]:
-    """Recursively walk through the connections to find paths to the target.
+def iter_paths(node: Cave, target: Union[Cave, str],
+               visit_twice: Optional[Union[Cave, str, bool]] = None) -> Iterator[CavePath]:
+    """Walk through the connections to find paths to the target.
+
+    This uses a stack of connection iterators instead of recursion, and
+    a single visited set that is undone when leaving a cave. Each path
+    is only generated once, so no deduplication is needed.
 
     Parameters:
-        node: Node to check the connections for.
+        node: Node to start from.
         target: Node to try and reach.
         visit_twice: Allow a small cave to be visited twice.
+            If True, then any single small cave may be visited twice.
 
-    Returns:
-        List of cave paths, where each path is a list of caves.
+    Yields:
+        Each path from the node to the target.
     """
-    if _path is None:
-        _path = []
-    if _visited is None:
-        _visited = {node}
-    else:
-        _visited = set(_visited)
-
-    # Handle visit limits
-    if node.is_small():
-        if node == visit_twice:
-            visit_twice = None
+    twice_cave: Optional[Cave] = None
+    if visit_twice is not None and not isinstance(visit_twice, bool):
+        twice_cave = Cave(visit_twice, node.test_case)
+    can_visit_twice = visit_twice is not None and visit_twice is not False
+
+    visited: Set[Cave] = set()
+    stack: List[Tuple[CavePath, Iterator[Cave], bool]] = [(CavePath(node), iter(node.connections()), False)]
+    while stack:
+        path, connections, used_twice = stack[-1]
+        for connection in connections:
+            # Found the target
+            if connection == target:
+                yield CavePath(connection, path)
+                continue
+
+            if connection == node:
+                continue
+
+            # Search further
+            if not connection.is_small():
+                stack.append((CavePath(connection, path), iter(connection.connections()), False))
+            elif connection not in visited:
+                visited.add(connection)
+                stack.append((CavePath(connection, path), iter(connection.connections()), False))
+            elif can_visit_twice and (twice_cave is None or connection == twice_cave):
+                can_visit_twice = False
+                stack.append((CavePath(connection, path), iter(connection.connections()), True))
+            else:
+                continue
+            break
+
+        # Every connection has been checked, so undo the visit
         else:
-            _visited.add(node)
+            stack.pop()
+            if used_twice:
+                can_visit_twice = True
+            else:
+                visited.discard(path.cave)
 
-    paths = []
-    for connection in node.connections():
-        # Found the target
-        if connection == target:
-            paths.append(_path)
 
-        # Recursively search further
-        elif connection not in _visited:
-            result = find_paths(connection, target, visit_twice=visit_twice,
-                                _path=_path + [connection], _visited=_visited)
-            paths.extend(result)
-    return paths
+def find_paths(node: Cave, target: Union[Cave, str],
+               visit_twice: Optional[Union[Cave, str, bool]] = None) -> List[List[Cave]]:
+    """Find all the paths to the target.
+
+    Returns:
+        List of cave paths, where each path is a list of caves between
+        the node and the target.
+    """
+    return [list(path)[1:-1] for path in iter_paths(node, target, visit_twice=visit_twice)]
+
+
+class CaveSystem(object):
+    """Count paths through the caves without building them.
+
+    Each cave is given an integer id, and small caves are given a bit
+    in a visited mask. The number of paths from a cave only depends on
+    the cave, the visited mask, and whether a small cave may still be
+    visited twice, so the counts can be cached and shared.
+    """
+
+    def __init__(self, test_case: int = 0) -> None:
+        """Intern the caves to integer ids."""
+        caves = Cave.all(test_case)
+        self.test_case = test_case
+        self.ids: Dict[Cave, int] = {cave: i for i, cave in enumerate(caves)}
+        self.adjacency: Tuple[Tuple[int, ...], ...] = tuple(
+            tuple(self.ids[connection] for connection in cave.connections()) for cave in caves)
+
+        masks = []
+        bit = 0
+        for cave in caves:
+            if cave.is_small():
+                masks.append(1 << bit)
+                bit += 1
+            else:
+                masks.append(0)
+        self.masks: Tuple[int, ...] = tuple(masks)
+
+    def count_paths(self, start: Union[Cave, str], target: Union[Cave, str], visit_twice: bool = False) -> int:
+        """Count the paths between two caves.
+
+        Parameters:
+            start: Cave to start from. This cannot be visited again.
+            target: Cave to finish at.
+            visit_twice: Allow any single small cave to be visited twice.
+        """
+        start_id = self.ids[Cave(start, self.test_case)]
+        target_id = self.ids[Cave(target, self.test_case)]
+        adjacency, masks = self.adjacency, self.masks
+
+        @lru_cache(maxsize=None)
+        def count(node: int, visited: int, twice: bool) -> int:
+            """Count the paths from a cave to the target."""
+            total = 0
+            for connection in adjacency[node]:
+                if connection == target_id:
+                    total += 1
+                elif connection == start_id:
+                    continue
+                elif not visited & masks[connection]:
+                    total += count(connection, visited | masks[connection], twice)
+                elif twice:
+                    total += count(connection, visited, False)
+            return total
+
+        return count(start_id, masks[start_id], visit_twice)
 
 
 def part_1(test_case: int = 0) -> int:
     """Find the number of paths to the end."""
-    return len(Cave('start', test_case).find_paths('end'))
+    return CaveSystem(test_case).count_paths('start', 'end')
 
 
 def part_2(test_case: int = 0) -> int:
     """Find the number of paths to end, with visiting a single small cave twice."""
-    paths = []
-    for cave in Cave.all(test_case):
-        if cave.is_small():
-            paths.extend(Cave('start', test_case).find_paths('end', visit_twice=cave))
-    return len(set(map(tuple, paths)))
+    return CaveSystem(test_case).count_paths('start', 'end', visit_twice=True)
 
 
 def test_part_1_1() -> None:
@@ -189,6 +306,14 @@ def test_part_2_3() -> None:
     assert part_2(test_case=3) == 3509
 
 
+def test_iter_paths() -> None:
+    """Check the path generator matches the path counts."""
+    start = Cave('start', 2)
+    assert len(list(start.iter_paths('end'))) == 19
+    paths = [tuple(path) for path in start.iter_paths('end', visit_twice=True)]
+    assert len(paths) == len(set(paths)) == 103
+
+
 if __name__ == '__main__':
     test_part_1_1()
     test_part_1_2()
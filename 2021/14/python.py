@@ -1,7 +1,8 @@
 """Day 14: Extended Polymerization"""
 
-from collections import Counter
-from typing import Dict, Generator, Tuple
+import numpy as np
+from itertools import product
+from typing import Dict, Generator, List, Optional, Tuple
 
 
 def load_input(test: bool = False) -> Generator[str, None, None]:
@@ -23,6 +24,68 @@ def parse_input(test: bool = False) -> Tuple[str, Dict[str, str]]:
     return template, replacement
 
 
+def compile_rules(template: str, replacement: Dict[str, str]) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """Convert the pair insertion rules to a transition matrix.
+
+    Each pair of elements is given an index, and the matrix maps the
+    count of each pair to the count of the pairs it becomes after a
+    single step.
+
+    Returns:
+        List of elements, initial count of each pair, and the matrix.
+    """
+    elements = sorted(set(template).union(*replacement, *replacement.values()))
+    index = {element: i for i, element in enumerate(elements)}
+    size = len(elements)
+
+    pairs = np.zeros(size * size, dtype=object)
+    for i in range(len(template) - 1):
+        pairs[index[template[i]] * size + index[template[i + 1]]] += 1
+
+    matrix = np.zeros((size * size, size * size), dtype=object)
+    for first, second in product(elements, repeat=2):
+        pair = index[first] * size + index[second]
+        mid = replacement.get(first + second)
+        if mid is None:
+            matrix[pair, pair] += 1
+        else:
+            matrix[index[first] * size + index[mid], pair] += 1
+            matrix[index[mid] * size + index[second], pair] += 1
+    return elements, pairs, matrix
+
+
+def _reduce(array: np.ndarray, modulo: Optional[int] = None) -> np.ndarray:
+    """Apply an optional modulo to an array."""
+    return array if modulo is None else array % modulo
+
+
+def count_pairs(pairs: np.ndarray, matrix: np.ndarray, steps: int, modulo: Optional[int] = None) -> np.ndarray:
+    """Get the pair counts after a number of steps.
+    The matrix is squared for each bit of the steps, so this takes
+    O(log steps) matrix products.
+    """
+    power = matrix
+    while steps:
+        if steps & 1:
+            pairs = _reduce(power.dot(pairs), modulo)
+        steps >>= 1
+        if steps:
+            power = _reduce(power.dot(power), modulo)
+    return pairs
+
+
+def count_elements(template: str, elements: List[str], pairs: np.ndarray,
+                   modulo: Optional[int] = None) -> Dict[str, int]:
+    """Count the elements from the pair counts.
+    Every element is the first of a pair, apart from the last element of
+    the template which never changes.
+    """
+    size = len(elements)
+    counts = pairs.reshape(size, size).sum(axis=1)
+    counts[elements.index(template[-1])] += 1
+    return {element: int(count) for element, count in zip(elements, _reduce(counts, modulo))}
+
+
 def polymerize(steps: int, test: bool = False) -> int:
     """Run the polymerization.
 
@@ -30,21 +93,12 @@ def polymerize(steps: int, test: bool = False) -> int:
         Difference between the quantity of the most and least common elements.
     """
     template, replacement = parse_input(test=test)
+    elements, pairs, matrix = compile_rules(template, replacement)
+    counts = count_elements(template, elements, count_pairs(pairs, matrix, steps))
 
-    counts = Counter(template)
-    pairs = Counter((template[i: i + 2] for i in range(len(template) - 1)))
-    for step in range(steps):
-        for pair, count in dict(pairs).items():
-            mid = replacement[pair]
-            counts[mid] += count
-            pairs[pair] -= count
-            pairs[pair[0] + mid] += count
-            pairs[mid + pair[1]] += count
-
-    least_common = min(counts, key=counts.get)
-    most_common = max(counts, key=counts.get)
-    return counts[most_common] - counts[least_common]
-
+    # Ignore any elements that only appear in the rules
+    counts = {element: count for element, count in counts.items() if count}
+    return max(counts.values()) - min(counts.values())
 
 
 def part_1(test: bool = False) -> int:
@@ -67,6 +121,16 @@ def test_part_2() -> None:
     assert part_2(test=True) == 2188189693529
 
 
+def test_count_elements() -> None:
+    """Check the element counts of a known step."""
+    template, replacement = parse_input(test=True)
+    elements, pairs, matrix = compile_rules(template, replacement)
+    counts = count_elements(template, elements, count_pairs(pairs, matrix, 10))
+    assert counts == {'B': 1749, 'C': 298, 'H': 161, 'N': 865}
+    counts = count_elements(template, elements, count_pairs(pairs, matrix, 10, modulo=100), modulo=100)
+    assert counts == {'B': 49, 'C': 98, 'H': 61, 'N': 65}
+
+
 if __name__ == '__main__':
     test_part_1()
     print(f'Part 1: {part_1()}')
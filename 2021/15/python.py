@@ -2,8 +2,11 @@
 https://adventofcode.com/2021/day/15
 """
 
+from __future__ import annotations
+
+import heapq
 import numpy as np
-from typing import Generator
+from typing import Generator, List, Optional, Tuple, Union
 
 
 def load_input(test: bool = False) -> Generator[str, None, None]:
@@ -23,82 +26,177 @@ def build_matrix(test: bool = False) -> np.ndarray:
     return np.array(lines, dtype=int)
 
 
-def dijkstras_algorithm(matrix: np.ndarray) -> float:
+def dijkstras_algorithm(matrix: Union[np.ndarray, TiledGrid], heuristic: bool = False, buckets: bool = False) -> int:
+    """Find the total risk of the shortest path.
+    See `_search` for the parameters.
+    """
+    return _search(matrix, heuristic=heuristic, buckets=buckets)[0]
+
+
+def shortest_path(matrix: Union[np.ndarray, TiledGrid], heuristic: bool = False,
+                  buckets: bool = False) -> Tuple[int, List[Tuple[int, int]]]:
+    """Find the total risk and coordinates of the shortest path.
+    See `_search` for the parameters.
+    """
+    risk, path = _search(matrix, heuristic=heuristic, buckets=buckets, return_path=True)
+    assert path is not None
+    return risk, path
+
+
+def _search(matrix: Union[np.ndarray, TiledGrid], heuristic: bool = False, buckets: bool = False,
+            return_path: bool = False) -> Tuple[int, Optional[List[Tuple[int, int]]]]:
     """Find the shortest path from the top left to the bottom right.
 
-    Source: https://levelup.gitconnected.com/dijkstras-shortest-path-algorithm-in-a-grid-eb505eb3a290
+    Cells are referenced by their flat index, so the neighbours are
+    found with index arithmetic instead of coordinates.
+
+    Parameters:
+        matrix: Cost of entering each cell.
+            A `TiledGrid` will calculate each cost when needed.
+        heuristic: Use the Manhattan distance to the target as an A*
+            heuristic. This reduces the number of cells checked.
+        buckets: Use Dial's algorithm, where the queue is a ring of
+            buckets for each distance, instead of a heap. This works
+            because the costs are small integers.
+        return_path: Also return the path taken.
+
+    Returns:
+        The total risk of the path, and the path coordinates if
+        requested, otherwise None.
     """
-    max_x, max_y = matrix.shape
-
-    # Initialize auxiliary arrays
-    distmap = np.ones(matrix.shape, dtype=int) * np.Infinity
-    distmap[0, 0] = 0
-    originmap = np.ones(matrix.shape, dtype=int) * np.nan
-    visited = np.zeros(matrix.shape, dtype=bool)
-    x = y = 0
-
-    # Loop Dijkstra until reaching the target cell
-    while True:
-        # Move to x+1, y
-        if x < max_x - 1:
-            if distmap[x+1, y] > matrix[x+1, y] + distmap[x, y] and not visited[x+1, y]:
-                distmap[x+1, y] = matrix[x+1, y] + distmap[x, y]
-                originmap[x+1, y] = np.ravel_multi_index([x, y], matrix.shape)
-        # Move to x-1, y
-        if x > 0:
-            if distmap[x-1, y] > matrix[x-1, y] + distmap[x, y] and not visited[x-1, y]:
-                distmap[x-1, y] = matrix[x-1, y] + distmap[x, y]
-                originmap[x-1, y] = np.ravel_multi_index([x, y], matrix.shape)
-        # Move to x, y+1
-        if y < max_y - 1:
-            if distmap[x, y+1] > matrix[x, y+1] + distmap[x, y] and not visited[x, y+1]:
-                distmap[x, y+1] = matrix[x, y+1] + distmap[x, y]
-                originmap[x, y+1] = np.ravel_multi_index([x, y], matrix.shape)
-        # Move to x, y-1
-        if y > 0:
-            if distmap[x, y-1] > matrix[x, y-1] + distmap[x, y] and not visited[x, y-1]:
-                distmap[x, y-1] = matrix[x, y-1] + distmap[x, y]
-                originmap[x, y-1] = np.ravel_multi_index([x, y], matrix.shape)
-
-        visited[x, y] = True
-        dismaptemp = distmap
-        dismaptemp[np.where(visited)] = np.Infinity
-
-        # Find the shortest path so far
-        x, y = np.unravel_index(np.argmin(dismaptemp), dismaptemp.shape)
-        if x == max_x-1 and y == max_y-1:
+    height, width = matrix.shape
+    size = height * width
+    target = size - 1
+    costs = matrix.ravel().tolist() if isinstance(matrix, np.ndarray) else matrix
+
+    # The lowest cost of a step keeps the heuristic from overestimating
+    min_cost = int(matrix.min()) if heuristic else 0
+    max_cost = int(matrix.max())
+    last_row, last_column = height - 1, width - 1
+
+    # No path can cost more than entering every cell at the highest cost
+    distances = [size * max_cost + 1] * size
+    distances[0] = 0
+    previous = [-1] * size if return_path else None
+    visited = bytearray(size)
+
+    # Each step increases the estimated total by at most the cost plus the heuristic change
+    ring_size = max_cost + min_cost + 1
+    ring: List[List[int]] = [[] for _ in range(ring_size)]
+    heap: List[Tuple[int, int]] = []
+    priority = (last_row + last_column) * min_cost
+    if buckets:
+        ring[priority % ring_size].append(0)
+    else:
+        heap.append((priority, 0))
+    queued = 1
+
+    while queued:
+        # Get the next closest cell
+        if buckets:
+            bucket = ring[priority % ring_size]
+            if not bucket:
+                priority += 1
+                continue
+            index = bucket.pop()
+        else:
+            priority, index = heapq.heappop(heap)
+        queued -= 1
+        if visited[index]:
+            continue
+        visited[index] = 1
+        if index == target:
             break
 
-    return distmap[max_x-1, max_y-1]
-
+        distance = distances[index]
+        x = index % width
+        for neighbour in (index - width if index >= width else -1,
+                          index + width if index < size - width else -1,
+                          index - 1 if x else -1,
+                          index + 1 if x < width - 1 else -1):
+            if neighbour < 0 or visited[neighbour]:
+                continue
+            new_distance = distance + costs[neighbour]
+            if new_distance < distances[neighbour]:
+                distances[neighbour] = new_distance
+                if previous is not None:
+                    previous[neighbour] = index
+                estimate = new_distance
+                if min_cost:
+                    estimate += (last_row - neighbour // width + last_column - neighbour % width) * min_cost
+                if buckets:
+                    ring[estimate % ring_size].append(neighbour)
+                else:
+                    heapq.heappush(heap, (estimate, neighbour))
+                queued += 1
+
+    result = int(distances[target])
+    if previous is None:
+        return result, None
+
+    path = []
+    index = target
+    while index >= 0:
+        path.append(divmod(index, width))
+        index = previous[index]
+    return result, path[::-1]
+
+
+class TiledGrid(object):
+    """View a matrix repeated in a grid of tiles without building it.
+    Each tile to the right or below is 1 higher than the previous,
+    wrapping back to 1 after 9.
+    """
 
-def increment_matrix(matrix: np.ndarray) -> np.ndarray:
-    """Add 1 to the matrix, and wrap to 1 if any value reaches 10."""
-    return (matrix % 9) + 1
+    __slots__ = ('base', 'tiles', 'shape', '_tile_height', '_tile_width', '_values')
+
+    def __init__(self, base: np.ndarray, tiles: int = 5) -> None:
+        """Set up the grid.
+
+        Parameters:
+            base: Matrix of the top left tile.
+            tiles: Number of tiles in each direction.
+        """
+        self.base: np.ndarray = base
+        self.tiles: int = tiles
+        self._tile_height, self._tile_width = base.shape
+        self.shape: Tuple[int, int] = (self._tile_height * tiles, self._tile_width * tiles)
+        self._values: List[int] = base.ravel().tolist()
+
+    def __getitem__(self, index: Union[int, Tuple[int, int]]) -> int:
+        """Get the value of a cell from its flat index or coordinate."""
+        if isinstance(index, tuple):
+            y, x = index
+        else:
+            y, x = divmod(index, self.shape[1])
+        tile_y, y = divmod(y, self._tile_height)
+        tile_x, x = divmod(x, self._tile_width)
+        return (self._values[y * self._tile_width + x] + tile_y + tile_x - 1) % 9 + 1
+
+    def _tile_values(self) -> List[int]:
+        """Get every value that appears in any tile."""
+        return [(value + increment - 1) % 9 + 1
+                for value in set(self._values) for increment in range(min(2 * self.tiles - 1, 9))]
+
+    def min(self) -> int:
+        """Get the lowest value in the grid."""
+        return min(self._tile_values())
+
+    def max(self) -> int:
+        """Get the highest value in the grid."""
+        return max(self._tile_values())
 
 
 def part_1(test: bool = False) -> int:
     """Get the total risk of the path."""
-    return int(dijkstras_algorithm(build_matrix(test=test)))
+    return dijkstras_algorithm(build_matrix(test=test))
 
 
-def part_2(test: bool = False) -> int:
+def part_2(test: bool = False, tiles: int = 5) -> int:
     """Get the total risk of the path when the matrix is 5x larger.
     Each adjacent copy of the matrix is 1 higher than the previous.
     """
-    top_left = build_matrix(test=test)
-
-    rows = [top_left]
-    for _ in range(4):
-        rows.append(increment_matrix(rows[-1]))
-    row = np.concatenate(rows, axis=0)
-
-    columns = [row]
-    for _ in range(4):
-        columns.append(increment_matrix(columns[-1]))
-    matrix = np.concatenate(columns, axis=1)
-
-    return int(dijkstras_algorithm(matrix))
+    return dijkstras_algorithm(TiledGrid(build_matrix(test=test), tiles))
 
 
 def test_part_1() -> None:
@@ -111,6 +209,29 @@ def test_part_2() -> None:
     assert part_2(test=True) == 315
 
 
+def test_dijkstras_algorithm() -> None:
+    """Check each queue and heuristic gives the same result."""
+    matrix = build_matrix(test=True)
+    for heuristic in (False, True):
+        for buckets in (False, True):
+            assert dijkstras_algorithm(matrix, heuristic=heuristic, buckets=buckets) == 40
+            risk, path = shortest_path(matrix, heuristic=heuristic, buckets=buckets)
+            assert risk == 40
+            assert path[0] == (0, 0) and path[-1] == (9, 9)
+            assert sum(matrix[coordinate] for coordinate in path[1:]) == 40
+
+
+def test_tiled_grid() -> None:
+    """Check the tiled grid matches the concatenated matrix."""
+    base = build_matrix(test=True)
+    tiles = [[(base + y + x - 1) % 9 + 1 for x in range(5)] for y in range(5)]
+    matrix = np.block(tiles)
+    grid = TiledGrid(base, 5)
+    assert grid.shape == matrix.shape
+    assert all(grid[i] == value for i, value in enumerate(matrix.ravel()))
+    assert (grid.min(), grid.max()) == (matrix.min(), matrix.max())
+
+
 if __name__ == '__main__':
     test_part_1()
     print(f'Part 1: {part_1()}')
@@ -24,28 +24,33 @@ def load_hex() -> str:
     return next(load_input())
 
 
-def gt(args: Generator[int, None, None]) -> bool:
+def literal(args: List[int]) -> int:
+    """Literal packets have no function, so give nothing to add."""
+    return 0
+
+
+def gt(args: List[int]) -> int:
     """Determine if the first value is greater than the second."""
-    return next(args) > next(args)
+    return int(args[0] > args[1])
 
 
-def lt(args: Generator[int, None, None]) -> bool:
+def lt(args: List[int]) -> int:
     """Determine if the first value is less than the second."""
-    return next(args) < next(args)
+    return int(args[0] < args[1])
 
 
-def eq(args: Generator[int, None, None]) -> bool:
+def eq(args: List[int]) -> int:
     """Determine if 2 values are equal."""
-    return next(args) == next(args)
+    return int(args[0] == args[1])
 
 
 class Packet(object):
     """Store a heirarchy of packets."""
 
-    __slots__ = ('type', 'version', 'value', 'subpackets')
+    __slots__ = ('type', 'version', 'value', 'subpackets', '_compiled')
 
-    # Map the functions to the packet types
-    FUNCTION_MAP: List[Callable] = [sum, math.prod, min, max, lambda args: 0, gt, lt, eq]
+    # Map the packet types to functions taking a list of values
+    FUNCTION_MAP: List[Callable[[List[int]], int]] = [sum, math.prod, min, max, literal, gt, lt, eq]
 
     # Give nicer names to some of the functions
     FNAME_OVERRIDE: Dict[str, str] = {'prod': 'math.prod', 'gt': 'operator.gt',
@@ -57,6 +62,7 @@ class Packet(object):
         self.version: int = version
         self.value: int = 0
         self.subpackets: List[Packet] = []
+        self._compiled: Optional[CompiledPacket] = None
 
     def __repr__(self) -> str:
         """Display the full formula in valid Python code."""
@@ -71,99 +77,165 @@ class Packet(object):
 
     def __iter__(self) -> Generator[Packet, None, None]:
         """Iterate through every packet, including the current one."""
-        yield self
-        for packet in self.subpackets:
-            yield from packet
+        stack = [self]
+        while stack:
+            packet = stack.pop()
+            yield packet
+            stack.extend(reversed(packet.subpackets))
 
     def eval(self) -> int:
         """Evaluate the stack of packets."""
-        return self.FUNCTION_MAP[self.type](packet.eval() for packet in self.subpackets) + self.value
+        return self.compile().eval()
 
-
-def hex_to_bin(hex: str) -> str:
-    """Convert hex characters to a binary format.
-    This converts each character separately.
-    """
-    return ''.join(bin(int(str(c), 16))[2:].zfill(4) for c in str(hex))
+    def compile(self) -> CompiledPacket:
+        """Flatten the packets into a program that can be evaluated.
+        The program is cached, so the packets must not be changed after.
+        """
+        if self._compiled is None:
+            self._compiled = CompiledPacket(self)
+        return self._compiled
 
 
-def _build_packet(binary: str) -> Tuple[Packet, int]:
-    """Create a packet from the binary string.
-    It may contain sub packets.
+class CompiledPacket(object):
+    """Store a packet heirarchy as a flat postorder program.
 
-    Returns:
-        Packet and length of binary used to generate it.
+    Each instruction is the packet type, its value, and how many values
+    it takes from the stack, so evaluating only needs a single loop.
     """
-    version = int(binary[:3], 2)
-    packet_type = int(binary[3:6], 2)
-    packet = Packet(version, packet_type)
 
-    # Literal value
-    if packet_type == 4:
+    __slots__ = ('program', 'versions')
 
-        # Split groups into chunks of 5, ignoring trailing data
-        data = binary[6:]
-        groups = [data[i * 5:(i+1) * 5] for i in range(len(data) // 5)]
+    def __init__(self, packet: Packet) -> None:
+        """Compile a packet heirarchy."""
+        self.program: List[Tuple[int, int, int]] = []
+        self.versions: List[int] = []
 
-        # Iterate through groups until the first character is 0
-        result = []
-        while groups[0].startswith('1'):
-            result.append(groups.pop(0)[1:])
-        result.append(groups.pop(0)[1:])
+        # Add each packet after all of its subpackets
+        stack = [(packet, False)]
+        while stack:
+            current, visited = stack.pop()
+            if visited:
+                self.program.append((current.type, current.value, len(current.subpackets)))
+                continue
+            self.versions.append(current.version)
+            stack.append((current, True))
+            stack.extend((subpacket, False) for subpacket in reversed(current.subpackets))
 
-        value = int(''.join(result), 2)
-        packet.value = value
-        return packet, 6 + 5 * len(result)
+    def version_sum(self) -> int:
+        """Get the sum of every packet version."""
+        return sum(self.versions)
 
-    # Contains multiple values
-    else:
-        length_type_id = binary[6]
+    def eval(self) -> int:
+        """Evaluate the program."""
+        operators = Packet.FUNCTION_MAP
+        stack: List[int] = []
+        for packet_type, value, count in self.program:
+            if packet_type == 4:
+                stack.append(value)
+            elif count:
+                args = stack[-count:]
+                del stack[-count:]
+                stack.append(operators[packet_type](args) + value)
+            else:
+                stack.append(operators[packet_type]([]) + value)
+        return stack[-1]
+
+
+class BitReader(object):
+    """Read bits from a buffer using a cursor."""
+
+    __slots__ = ('data', 'position')
+
+    def __init__(self, data: bytes) -> None:
+        """Set up the reader at the start of the data."""
+        self.data: bytes = data
+        self.position: int = 0
+
+    @classmethod
+    def from_hex(cls, hex: str) -> BitReader:
+        """Create a reader from a hex string."""
+        return cls(bytes.fromhex(hex if len(hex) % 2 == 0 else hex + '0'))
+
+    @classmethod
+    def from_binary(cls, binary: str) -> BitReader:
+        """Create a reader from a binary string."""
+        binary += '0' * (-len(binary) % 8)
+        return cls(int(binary, 2).to_bytes(len(binary) // 8, 'big') if binary else b'')
+
+    def read(self, bits: int) -> int:
+        """Read a number of bits as an int and move the cursor forward."""
+        start = self.position
+        end = start + bits
+        if end > len(self.data) * 8:
+            raise EOFError('not enough data to read')
+        self.position = end
+
+        # Only the bytes containing the bits are converted
+        first, last = start // 8, (end + 7) // 8
+        value = int.from_bytes(self.data[first:last], 'big')
+        return (value >> (last * 8 - end)) & ((1 << bits) - 1)
+
+
+def decode_packet(reader: BitReader) -> Packet:
+    """Decode a packet and any sub packets from the reader.
+
+    This uses an explicit stack of the unfinished operator packets, with
+    either the bit position they end at or the number of sub packets
+    they contain.
+    """
+    root = packet = Packet(reader.read(3), reader.read(3))
+    stack: List[Tuple[Packet, int, int]] = []
+    while True:
+        # Literal value
+        if packet.type == 4:
+            value = 0
+            while True:
+                group = reader.read(5)
+                value = value << 4 | group & 0b1111
+                if not group & 0b10000:
+                    break
+            packet.value = value
 
         # Contains length of subpackets
-        if length_type_id == '0':
-            subpacket_length = int(binary[7:22], 2)
-
-            data = binary[22:22 + subpacket_length]
-            while data:
-                subpacket, offset = _build_packet(data)
-                packet.subpackets.append(subpacket)
-                data = data[offset:]
-            length = subpacket_length + 22
+        elif not reader.read(1):
+            length = reader.read(15)
+            stack.append((packet, reader.position + length, -1))
 
         # Contains count of subpackets
-        elif length_type_id == '1':
-            subpacket_count = int(binary[7:18], 2)
+        else:
+            stack.append((packet, -1, reader.read(11)))
+
+        # Finish any packets that have all their subpackets
+        while stack:
+            parent, end, count = stack[-1]
+            if end >= 0 and reader.position < end or count >= 0 and len(parent.subpackets) < count:
+                break
+            stack.pop()
 
-            length = 18
-            data = binary[18:]
-            for _ in range(subpacket_count):
-                subpacket, offset = _build_packet(data)
-                packet.subpackets.append(subpacket)
-                data = data[offset:]
-                length += offset
+        if not stack:
+            return root
 
-        return packet, length
+        packet = Packet(reader.read(3), reader.read(3))
+        stack[-1][0].subpackets.append(packet)
 
 
 def build_packet(binary: str) -> Packet:
     """Build a packet from a binary string."""
-    return _build_packet(binary=binary)[0]
+    return decode_packet(BitReader.from_binary(binary))
 
 
 def part_1(hex: Optional[str] = None) -> int:
     """Find the sum of contained versions."""
     if hex is None:
         hex = load_hex()
-    packet = build_packet(hex_to_bin(hex))
-    return sum(subpacket.version for subpacket in packet)
+    return decode_packet(BitReader.from_hex(hex)).compile().version_sum()
 
 
 def part_2(hex: Optional[str] = None) -> int:
     """Find the result of the packet calculation."""
     if hex is None:
         hex = load_hex()
-    packet = build_packet(hex_to_bin(hex))
-    return packet.eval()
+    return decode_packet(BitReader.from_hex(hex)).compile().eval()
 
 
 def test_part_1_1() -> None:
@@ -226,6 +298,19 @@ def test_part_2_8() -> None:
     assert part_2('9C0141080250320F1802104A08') == 1
 
 
+def test_compile_deep() -> None:
+    """Check a packet nested past the recursion limit can be evaluated."""
+    root = packet = Packet(1, 0)
+    for _ in range(5000):
+        packet.subpackets.append(Packet(1, 1))
+        packet = packet.subpackets[-1]
+    packet.subpackets.append(Packet(1, 4))
+    packet.subpackets[-1].value = 7
+    compiled = root.compile()
+    assert compiled.eval() == 7
+    assert compiled.version_sum() == sum(subpacket.version for subpacket in root) == 5002
+
+
 if __name__ == '__main__':
     test_part_1_1()
     test_part_1_2()
@@ -2,29 +2,91 @@
 https://adventofcode.com/2024/day/1
 """
 
-from typing import Iterator, Tuple, List
+import numpy as np
+from typing import Optional, Tuple
 
 
-def load_input(test: bool = False) -> Iterator[str]:
-    """Read the input.txt file.
+def parse_ints(data: bytes) -> np.ndarray:
+    """Parse every unsigned integer from a block of bytes.
 
-    Yields:
-        Each line as a string.
+    The runs of digits are found with numpy, and then the values are
+    built one digit position at a time across every number at once.
     """
-    with open(f'{"test-" if test else ""}input.txt', 'r') as f:
-        for line in f:
-            yield line.strip('\r\n')
+    buffer = np.frombuffer(data, dtype=np.uint8)
+    digits = (buffer >= ord('0')) & (buffer <= ord('9'))
+    edges = np.diff(digits.astype(np.int8), prepend=0, append=0)
+    starts = np.flatnonzero(edges == 1)
+    lengths = np.flatnonzero(edges == -1) - starts
 
+    values = np.zeros(len(starts), dtype=np.int64)
+    for i in range(int(lengths.max(initial=0))):
+        valid = lengths > i
+        values[valid] = values[valid] * 10 + (buffer[starts[valid] + i] - ord('0'))
+    return values
 
-def build_lists(test: bool = False) -> Tuple[List[int], List[int]]:
-    """Build the left and right light from the text file."""
-    left_list = []
-    right_list = []
-    for line in load_input(test):
-        l, r = map(int, line.split())
-        left_list.append(l)
-        right_list.append(r)
-    return left_list, right_list
+
+def build_lists(test: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+    """Build the left and right list from the text file."""
+    with open(f'{"test-" if test else ""}input.txt', 'rb') as f:
+        values = parse_ints(f.read())
+    return values[0::2], values[1::2]
+
+
+def use_counting(*arrays: np.ndarray, max_range: Optional[int] = None) -> bool:
+    """Determine if the values are in a small enough range to count.
+
+    Parameters:
+        arrays: Arrays of values.
+        max_range: Largest range of values to allow.
+            Defaults to the total number of values.
+    """
+    if max_range is None:
+        max_range = sum(map(len, arrays))
+    if not all(map(len, arrays)):
+        return False
+    low = min(int(array.min()) for array in arrays)
+    high = max(int(array.max()) for array in arrays)
+    return high - low <= max_range
+
+
+def sort_list(values: np.ndarray, counting: bool = False) -> np.ndarray:
+    """Sort a list of values.
+    If counting, then the values are counted and repeated in order.
+    """
+    if not counting or not len(values):
+        return np.sort(values)
+    low = values.min()
+    counts = np.bincount(values - low)
+    return np.repeat(np.arange(low, low + len(counts)), counts)
+
+
+def distance(left: np.ndarray, right: np.ndarray, counting: Optional[bool] = None) -> int:
+    """Get the total distance between the sorted lists."""
+    if not len(left) or not len(right):
+        return 0
+    if counting is None:
+        counting = use_counting(left, right)
+    return int(np.abs(sort_list(left, counting) - sort_list(right, counting)).sum())
+
+
+def similarity(left: np.ndarray, right: np.ndarray, counting: Optional[bool] = None) -> int:
+    """Get the total of each left value multiplied by its count in the right list."""
+    if not len(left) or not len(right):
+        return 0
+    if counting is None:
+        counting = use_counting(left, right)
+
+    # Count every value in the range
+    if counting:
+        low = min(left.min(), right.min())
+        counts = np.bincount(right - low, minlength=max(left.max(), right.max()) - low + 1)
+        return int((left * counts[left - low]).sum())
+
+    # Join the left list to the unique right values
+    values, counts = np.unique(right, return_counts=True)
+    index = np.minimum(np.searchsorted(values, left), len(values) - 1)
+    found = values[index] == left
+    return int((left[found] * counts[index[found]]).sum())
 
 
 def part_1(test: bool = False) -> int:
@@ -46,7 +108,7 @@ def part_1(test: bool = False) -> int:
         list, add up the distances between all of the pairs you found.
     """
     left_list, right_list = build_lists(test)
-    return sum(abs(l - r) for l, r in zip(sorted(left_list), sorted(right_list)))
+    return distance(left_list, right_list)
 
 
 def part_2(test: bool = False) -> int:
@@ -59,7 +121,7 @@ def part_2(test: bool = False) -> int:
         by the number of times that number appears in the right list.
     """
     left_list, right_list = build_lists(test)
-    return sum(num * right_list.count(num) for num in left_list)
+    return similarity(left_list, right_list)
 
 
 def test_part_1() -> None:
@@ -72,6 +134,24 @@ def test_part_2() -> None:
     assert part_2(test=True) == 31
 
 
+def test_counting() -> None:
+    """Check counting gives the same results as sorting."""
+    left_list, right_list = build_lists(test=True)
+    for counting in (False, True):
+        assert distance(left_list, right_list, counting=counting) == 11
+        assert similarity(left_list, right_list, counting=counting) == 31
+
+
+def test_empty() -> None:
+    """Check empty lists have no distance or similarity."""
+    empty = parse_ints(b'')
+    assert not use_counting(empty, empty)
+    for counting in (None, False, True):
+        assert distance(empty, empty, counting=counting) == 0
+        assert similarity(empty, empty, counting=counting) == 0
+    assert len(sort_list(empty, counting=True)) == 0
+
+
 if __name__ == '__main__':
     test_part_1()
     print(f'Part 1: {part_1()}')
@@ -1,4 +1,6 @@
-from typing import Iterator, List
+import math
+import numpy as np
+from typing import Iterator, List, Sequence
 
 
 def read_input(test: bool = False) -> Iterator[str]:
@@ -21,43 +23,74 @@ def load_data(test: bool = False):
     return result
 
 
-def is_safe(levels: List[int]) -> bool:
+def is_safe(levels: Sequence[int], tolerance: int = 0) -> bool:
     """Determine if a levels reading is safe.
 
     The levels are either all increasing or all decreasing.
     Any two adjacent levels differ by at least one and at most three.
-    """
-    increasing = levels[0] < levels[-1]
 
-    # Check they are increasing/decreasing
-    levels_sorted = list(sorted(levels))
-    if not increasing:
-        levels_sorted.reverse()
-    if levels != levels_sorted:
-        return False
+    For each level, this finds the fewest removals needed for it to be
+    the last level kept. Only the previous `tolerance + 1` levels can be
+    the one kept before it, so this is a single linear pass.
 
-    # Check the difference between each number
-    pairs = zip(levels[:-1], levels[1:])
-    diffs = [abs(i - j) for i, j in pairs]
-    return 1 <= min(diffs) and max(diffs) <= 3
+    Parameters:
+        levels: Levels reading.
+        tolerance: Number of levels that are allowed to be removed.
+    """
+    count = len(levels)
+    for direction in (1, -1):
+        removals = [math.inf] * count
+        for i in range(count):
+            best = i if i <= tolerance else math.inf
+            for j in range(max(0, i - tolerance - 1), i):
+                if removals[j] + i - j - 1 < best and 1 <= (levels[i] - levels[j]) * direction <= 3:
+                    best = removals[j] + i - j - 1
+            removals[i] = best
+        if any(removals[i] + count - 1 - i <= tolerance for i in range(max(0, count - tolerance - 1), count)):
+            return True
+    return False
+
+
+def count_safe(reports: List[List[int]], tolerance: int = 0) -> int:
+    """Count how many reports are safe.
+
+    This is the same as `is_safe`, but the reports are padded into a
+    2D array so that every report is checked at once.
+    """
+    lengths = np.array(list(map(len, reports)))
+    width = int(lengths.max(initial=0))
+    levels = np.zeros((len(reports), width), dtype=np.int64)
+    levels[np.arange(width) < lengths[:, None]] = np.fromiter(
+        (level for report in reports for level in report), dtype=np.int64)
+
+    rows = np.arange(len(reports))
+    safe = np.zeros(len(reports), dtype=bool)
+    for direction in (1, -1):
+        removals = np.full(levels.shape, width + tolerance + 1, dtype=np.int64)
+        for i in range(width):
+            best = removals[:, i]
+            if i <= tolerance:
+                best[:] = i
+            for j in range(max(0, i - tolerance - 1), i):
+                diffs = (levels[:, i] - levels[:, j]) * direction
+                valid = (1 <= diffs) & (diffs <= 3)
+                np.minimum(best, np.where(valid, removals[:, j] + i - j - 1, best), out=best)
+
+        for offset in range(tolerance + 1):
+            last = lengths - 1 - offset
+            valid = last >= 0
+            safe[valid] |= removals[rows[valid], last[valid]] + offset <= tolerance
+    return int(safe.sum())
 
 
 def part_1(test: bool = False) -> int:
     """Count how many levels are safe."""
-    return sum(is_safe(levels) for levels in load_data(test))
+    return count_safe(load_data(test))
 
 
 def part_2(test: bool = False) -> int:
     """Count how many levels are within tolerance."""
-    count = 0
-    for levels in load_data(test):
-        count += 1
-        for i in range(len(levels) + 1):
-            if is_safe(levels[:i - 1] + levels[i:]) if i else is_safe(levels):
-                break
-        else:
-            count -= 1
-    return count
+    return count_safe(load_data(test), tolerance=1)
 
 
 def test_part_1() -> None:
@@ -70,6 +103,13 @@ def test_part_2() -> None:
     assert part_2(test=True) == 4
 
 
+def test_is_safe() -> None:
+    """Check the single report version matches the vectorised version."""
+    reports = load_data(test=True)
+    for tolerance in range(3):
+        assert sum(is_safe(levels, tolerance) for levels in reports) == count_safe(reports, tolerance)
+
+
 if __name__ == '__main__':
     test_part_1()
     print(f'Part 1: {part_1()}')
@@ -2,53 +2,196 @@
 https://adventofcode.com/2024/day/3
 """
 
+import os
 import re
-import math
-from typing import Iterator, List
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Iterable, Iterator, Optional, Tuple
 
 
-def read_input(test: bool = False) -> Iterator[str]:
-    """Read the input.txt file.
+# Match any instruction
+INSTRUCTION = re.compile(rb"mul\((\d+),(\d+)\)|(do\(\))|(don't\(\))")
+
+# Match an incomplete instruction at the end of the data
+PARTIAL_INSTRUCTION = re.compile(rb"(?:mul\(\d+,\d*|mul\(\d*|mul|mu|m|don't\(|don't|don'|don|do\(|do|d)\Z")
+
+
+def read_chunks(test: bool = False, chunk_size: int = 1 << 20) -> Iterator[bytes]:
+    """Read the input.txt file in chunks.
+    Line breaks are removed, as the memory is one continuous block.
 
     Yields:
-        Each line as a string.
+        Each chunk as bytes.
     """
-    with open(f'{"test-" if test else ""}input.txt', 'r') as f:
-        for line in f:
-            yield line.strip('\r\n')
+    with open(f'{"test-" if test else ""}input.txt', 'rb') as f:
+        while chunk := f.read(chunk_size):
+            yield chunk.replace(b'\r', b'').replace(b'\n', b'')
 
 
-def read_memory(test: bool = False) -> str:
-    """Load in the memory from the text file."""
-    return ''.join(read_input(test))
+class MemoryScanner(object):
+    """Scan memory for instructions one chunk at a time.
 
+    The results before the first `do()` or `don't()` are kept separate,
+    as whether they are enabled depends on the state at the start. This
+    allows the scan to start from any point in the memory.
+    """
 
-def scan_memory(memory: str) -> int:
-    """Find all the matching memory records.
-    With the results, multiply each one then add them all together.
+    __slots__ = ('total', 'leading', 'trailing', 'enabled', 'remaining')
+
+    def __init__(self) -> None:
+        """Set up the scanner with no results."""
+        self.total: int = 0
+        self.leading: int = 0
+        self.trailing: int = 0
+        self.enabled: Optional[bool] = None
+        self.remaining: bytes = b''
+
+    def _apply(self, match: re.Match) -> None:
+        """Apply a single instruction."""
+        a, b, do, dont = match.groups()
+        if do:
+            self.enabled = True
+        elif dont:
+            self.enabled = False
+        else:
+            result = int(a) * int(b)
+            self.total += result
+            if self.enabled is None:
+                self.leading += result
+            elif self.enabled:
+                self.trailing += result
+
+    def feed(self, chunk: bytes) -> None:
+        """Scan the next chunk of memory.
+        An instruction split at the end is kept until the next chunk.
+        """
+        data = self.remaining + chunk if self.remaining else chunk
+        end = 0
+        for match in INSTRUCTION.finditer(data):
+            self._apply(match)
+            end = match.end()
+
+        partial = PARTIAL_INSTRUCTION.search(data, end)
+        self.remaining = data[partial.start():] if partial else b''
+
+    def complete(self, chunk: bytes) -> bool:
+        """Try to complete the remaining instruction without scanning further.
+
+        Returns:
+            If more data is needed.
+        """
+        data = self.remaining + chunk
+        self.remaining = b''
+        match = INSTRUCTION.match(data)
+        if match is not None:
+            self._apply(match)
+        elif PARTIAL_INSTRUCTION.match(data):
+            self.remaining = data
+        return bool(self.remaining)
+
+    def enabled_total(self, enabled: bool = True) -> int:
+        """Get the total of the enabled results for a starting state."""
+        return self.leading * enabled + self.trailing
+
+    def final_state(self, enabled: bool = True) -> bool:
+        """Get if the results are enabled at the end for a starting state."""
+        return enabled if self.enabled is None else self.enabled
+
+
+def scan_memory(chunks: Iterable[bytes], enabled: bool = True) -> Tuple[int, int, bool]:
+    """Scan the memory for instructions in a single pass.
+
+    With the `mul` results, multiply each one then add them all together.
+    Any `don't()` instructions disable the following results until the
+    next `do()` instruction. An instruction split between chunks is
+    kept until the next chunk arrives, so memory use only depends on
+    the chunk size. A single `mmap` can also be given as the chunk.
+
+    Parameters:
+        chunks: Blocks of memory in order.
+        enabled: If the results start enabled.
+
+    Returns:
+        Total of every result, total of the enabled results, and if the
+        results are enabled at the end.
     """
-    total = 0
-    for match in re.findall(r'mul\((\d+,\d+)\)', memory):
-        a, b = map(int, match.split(','))
-        total += a * b
-    return total
+    scanner = MemoryScanner()
+    for chunk in chunks:
+        scanner.feed(chunk)
+    return scanner.total, scanner.enabled_total(enabled), scanner.final_state(enabled)
+
 
+def _scan_range(path: str, start: int, end: int, chunk_size: int = 1 << 20
+                ) -> Tuple[int, int, int, Optional[bool]]:
+    """Scan the instructions starting within a range of a file.
 
-def filter_memory(memory: str) -> str:
-    """Filter out memory blocks ignored by instructions.
-    This removes anything between `don't()` and `do()`.
+    Any instruction still incomplete at the end of the range is finished
+    by reading past the end, but nothing starting after the end is used.
+    An instruction cannot start inside another, so any partial one at
+    the start of the range is ignored.
+
+    Returns:
+        The scanner results, so they can be sent between processes.
+    """
+    scanner = MemoryScanner()
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while start < end:
+            chunk = f.read(min(chunk_size, end - start))
+            if not chunk:
+                break
+            start += len(chunk)
+            scanner.feed(chunk.replace(b'\r', b'').replace(b'\n', b''))
+
+        # Read the overlap with the next range
+        while scanner.remaining:
+            chunk = f.read(64)
+            if not chunk or not scanner.complete(chunk.replace(b'\r', b'').replace(b'\n', b'')):
+                break
+    return scanner.total, scanner.leading, scanner.trailing, scanner.enabled
+
+
+def scan_memory_parallel(path: str, workers: Optional[int] = None, range_size: int = 1 << 26,
+                         enabled: bool = True) -> Tuple[int, int, bool]:
+    """Scan a memory file using multiple processes.
+
+    The file is split into ranges which are scanned separately. The
+    results of each range are then joined in order, using the state at
+    the end of the previous range to pick which results are enabled.
+
+    Parameters:
+        path: Path to the memory file.
+        workers: Number of processes to use.
+        range_size: Number of bytes to scan in each process.
+        enabled: If the results start enabled.
+
+    Returns:
+        The same result as `scan_memory`.
     """
-    return re.sub("(don't\(\))(.*?)(do\(\))", '', memory)
+    size = os.path.getsize(path)
+    starts = range(0, size, range_size)
+    ends = [min(start + range_size, size) for start in starts]
+
+    total = enabled_total = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(_scan_range, repeat(path), starts, ends)
+        for range_total, leading, trailing, state in results:
+            total += range_total
+            enabled_total += leading * enabled + trailing
+            if state is not None:
+                enabled = state
+    return total, enabled_total, enabled
 
 
 def part_1(test: bool = False) -> int:
-    """Count how many levels are safe."""
-    return scan_memory(read_memory(test))
+    """Add up the results of all the multiply instructions."""
+    return scan_memory(read_chunks(test))[0]
 
 
 def part_2(test: bool = False) -> int:
-    """Count how many levels are within tolerance."""
-    return scan_memory(filter_memory(read_memory(test)))
+    """Add up the results of the enabled multiply instructions."""
+    return scan_memory(read_chunks(test))[1]
 
 
 def test_part_1() -> None:
@@ -61,6 +204,26 @@ def test_part_2() -> None:
     assert part_2(test=True) == 48
 
 
+def test_scan_memory_parallel() -> None:
+    """Check the parallel scan matches the single scan."""
+    memory = b"xmul(2,4)&mul[3,7]!^don't()_mul(5,5)+mul(32,64](mul(11,8)undo()?mul(8,5))\n" * 10
+    expected = scan_memory([memory.replace(b'\n', b'')])
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'memory.txt')
+        with open(path, 'wb') as f:
+            f.write(memory)
+        for range_size in (1, 7, 100, 1000):
+            assert scan_memory_parallel(path, workers=2, range_size=range_size) == expected
+
+
+def test_scan_memory_chunks() -> None:
+    """Check instructions split between chunks are still found."""
+    memory = b"xmul(2,4)&mul[3,7]!^don't()_mul(5,5)+mul(32,64](mul(11,8)undo()?mul(8,5))"
+    for size in range(1, 10):
+        chunks = (memory[i:i + size] for i in range(0, len(memory), size))
+        assert scan_memory(chunks) == (161, 48, True)
+
+
 if __name__ == '__main__':
     test_part_1()
     print(f'Part 1: {part_1()}')
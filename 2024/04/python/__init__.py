@@ -3,7 +3,26 @@ https://adventofcode.com/2024/day/4
 """
 
 import numpy as np
-from typing import Iterator
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+
+# Every horizontal, vertical and diagonal direction as (y, x)
+DIRECTIONS = [(dy, dx) for dy in (-1, 0, 1) for dx in (-1, 0, 1) if dy or dx]
+
+# Transforms that can be applied to a pattern
+SYMMETRIES: Dict[str, Callable[[np.ndarray], np.ndarray]] = {
+    'identity': lambda arr: arr,
+    'rot90': lambda arr: np.rot90(arr, 1),
+    'rot180': lambda arr: np.rot90(arr, 2),
+    'rot270': lambda arr: np.rot90(arr, 3),
+    'fliplr': np.fliplr,
+    'flipud': np.flipud,
+    'transpose': np.transpose,
+    'antitranspose': lambda arr: np.rot90(arr, 2).T,
+}
+
+ROTATIONS = ('identity', 'rot90', 'rot180', 'rot270')
 
 
 def read_input(test: bool = False) -> Iterator[str]:
@@ -22,6 +41,62 @@ def load_array(test: bool) -> np.ndarray:
     return np.array(list(map(list, read_input(test))))
 
 
+def build_trie(words: Iterable[str]) -> Dict[str, Any]:
+    """Build a prefix tree of words.
+    The end of a word is marked with an empty key.
+    """
+    trie: Dict[str, Any] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = word
+    return trie
+
+
+def wordsearch_many(arr: np.ndarray, words: Iterable[str]) -> Dict[str, int]:
+    """Search an array for many words at once.
+    All 8 directions are supported.
+
+    For each direction, a boolean array marks every start position that
+    matches the prefix so far. Walking through a prefix tree extends
+    that array one letter at a time, so words with the same prefix
+    share the comparisons.
+
+    Parameters:
+        arr: 2D character array.
+        words: Case sensitive words to search for.
+
+    Returns:
+        The number of matches found for each word.
+    """
+    words = list(words)
+    matches = dict.fromkeys(words, 0)
+    trie = build_trie(words)
+    height, width = arr.shape
+
+    # Pad the array so that every offset can be sliced
+    pad = max(map(len, words), default=1)
+    padded = np.pad(arr.astype('<U1').view(np.uint32), pad)
+
+    for dy, dx in DIRECTIONS:
+        stack = [(trie, 0, np.ones(arr.shape, dtype=bool))]
+        while stack:
+            node, depth, mask = stack.pop()
+            y, x = pad + depth * dy, pad + depth * dx
+            letters = padded[y:y + height, x:x + width]
+            for char, child in node.items():
+                if not char:
+                    # A single letter has no direction, so only count it once
+                    if depth > 1 or (dy, dx) == DIRECTIONS[0]:
+                        matches[child] += int(mask.sum())
+                    continue
+                child_mask = mask & (letters == ord(char))
+                if child_mask.any():
+                    stack.append((child, depth + 1, child_mask))
+    return matches
+
+
 def wordsearch(arr: np.ndarray, search: str) -> int:
     """Search an array for a word.
     All directions are supported.
@@ -33,19 +108,84 @@ def wordsearch(arr: np.ndarray, search: str) -> int:
     Returns:
         The number of matches found.
     """
-    matches = 0
-
-    for rot in range(4):
-        arr_rot = np.rot90(arr, rot)
-        height, width = arr_rot.shape
-        for x in range(3, width):
-            for y in range(height):
-                # Search to the left
-                matches += all(arr_rot[y][x - i] == c for i, c in enumerate(search))
-
-                # Search diagonal to the top left
-                if y >= 3:
-                    matches += all(arr_rot[y - i][x - i] == c for i, c in enumerate(search))
+    return wordsearch_many(arr, [search])[search]
+
+
+def pattern_variants(pattern: Sequence[str], symmetries: Iterable[str] = ('identity',)) -> List[np.ndarray]:
+    """Get every unique variant of a pattern.
+
+    Parameters:
+        pattern: Rows of the pattern.
+        symmetries: Names of the transforms from `SYMMETRIES` to apply.
+
+    Returns:
+        List of 2D character arrays.
+    """
+    base = np.array([list(row) for row in pattern])
+    variants: Dict[bytes, np.ndarray] = {}
+    for symmetry in symmetries:
+        variant = SYMMETRIES[symmetry](base)
+        variants.setdefault(variant.tobytes() + bytes(variant.shape), variant)
+    return list(variants.values())
+
+
+def kernel_search(arr: np.ndarray, patterns: Iterable[Sequence[str]],
+                  symmetries: Iterable[str] = ('identity',), wildcard: str = '.') -> List[int]:
+    """Search an array for small 2D patterns.
+
+    Each letter of a pattern is compared against a shifted slice of the
+    whole array, and the comparisons are shared between every pattern
+    and variant, so each (offset, letter) is only checked once. Each
+    comparison is kept until its last use, so memory depends on how
+    many (offset, letter) pairs are shared between the patterns.
+
+    Parameters:
+        arr: 2D character array.
+        patterns: Patterns to search for, as a list of rows.
+        symmetries: Transforms of the patterns to also search for.
+            Identical variants are only counted once.
+        wildcard: Character in a pattern that matches anything.
+
+    Returns:
+        The number of matches found for each pattern.
+    """
+    symmetries = list(symmetries)
+    variants = [pattern_variants(pattern, symmetries) for pattern in patterns]
+    height, width = arr.shape
+
+    # Pad the end of the array so that every offset can be sliced
+    pad = max((max(variant.shape) for pattern in variants for variant in pattern), default=1)
+    padded = np.pad(arr.astype('<U1').view(np.uint32), ((0, pad), (0, pad)))
+
+    # Variants larger than the array can never match
+    variants = [[variant for variant in pattern if variant.shape[0] <= height and variant.shape[1] <= width]
+                for pattern in variants]
+
+    # Count how many times each comparison is used, so it can be dropped after the last use
+    uses: Counter[Tuple[int, int, str]] = Counter(
+        (y, x, char) for pattern in variants for variant in pattern
+        for (y, x), char in np.ndenumerate(variant) if char != wildcard)
+
+    comparisons: Dict[Tuple[int, int, str], np.ndarray] = {}
+    matches = []
+    for pattern in variants:
+        count = 0
+        for variant in pattern:
+            # Only count start positions where the whole pattern fits
+            pattern_height, pattern_width = variant.shape
+            mask = np.ones((height - pattern_height + 1, width - pattern_width + 1), dtype=bool)
+            for (y, x), char in np.ndenumerate(variant):
+                if char == wildcard:
+                    continue
+                key = (y, x, char)
+                if key not in comparisons:
+                    comparisons[key] = padded[y:y + height, x:x + width] == ord(char)
+                mask &= comparisons[key][:mask.shape[0], :mask.shape[1]]
+                uses[key] -= 1
+                if not uses[key]:
+                    del comparisons[key]
+            count += int(mask.sum())
+        matches.append(count)
     return matches
 
 
@@ -68,10 +208,8 @@ def xsearch(arr: np.ndarray, search: str) -> int:
     except ValueError:
         raise ValueError('search must be exactly 3 characters')
 
-    matches = 0
-    for y, x in zip(*np.where(arr[1:-1,1:-1] == middle)):
-        matches += {arr[y][x], arr[y+2][x+2]} == {arr[y+2][x], arr[y][x+2]} == {left, right}
-    return matches
+    pattern = [f'{left}.{right}', f'.{middle}.', f'{left}.{right}']
+    return kernel_search(arr, [pattern], symmetries=ROTATIONS)[0]
 
 
 def part_1(test: bool = False) -> int:
@@ -98,6 +236,41 @@ def test_part_2() -> None:
     assert part_2(test=True) == 9
 
 
+def test_wordsearch_many() -> None:
+    """Check searching many words matches searching each word."""
+    arr = load_array(True)
+    words = ['XMAS', 'XM', 'MAS', 'SAMX', 'A', 'XMASX']
+    matches = wordsearch_many(arr, words)
+    assert matches == {'XMAS': 18, 'XM': 52, 'MAS': 38, 'SAMX': 18, 'A': 24, 'XMASX': 5}
+    assert matches['A'] == (arr == 'A').sum()
+
+
+def test_kernel_search() -> None:
+    """Check patterns with symmetries."""
+    arr = load_array(True)
+    straight = kernel_search(arr, [['XMAS']], symmetries=ROTATIONS)
+    diagonal = kernel_search(arr, [['X...', '.M..', '..A.', '...S']], symmetries=SYMMETRIES)
+    assert straight[0] + diagonal[0] == wordsearch(arr, 'XMAS')
+    assert kernel_search(arr, [['M.S', '.A.', 'M.S'], ['S.S', '.A.', 'M.M']], symmetries=ROTATIONS) == [9, 9]
+    assert kernel_search(arr, [['M.S', '.A.', 'M.S']]) == [2]
+
+
+def test_kernel_search_wildcard_edges() -> None:
+    """Check trailing wildcards cannot hang off the edge of the array."""
+    arr = np.array([list('AB'), list('CA')])
+    assert kernel_search(arr, [['A.']]) == kernel_search(arr, [['.A']]) == [1]
+    assert kernel_search(arr, [['A', '.']]) == [1]
+    assert kernel_search(arr, [['A.']], symmetries=('identity', 'fliplr')) == [2]
+
+
+def test_kernel_search_small_array() -> None:
+    """Check patterns larger than the array are skipped."""
+    arr = np.array([list('XMASXMAS'), list('SAMXSAMX')])
+    assert kernel_search(arr, [['XMAS']], symmetries=ROTATIONS) == [4]
+    assert kernel_search(np.array([list('MAS')]), [['MAS', 'MAS']]) == [0]
+    assert xsearch(np.array([list('MAS')]), 'MAS') == 0
+
+
 if __name__ == '__main__':
     test_part_1()
     print(f'Part 1: {part_1()}')
@@ -2,7 +2,7 @@
 https://adventofcode.com/2024/day/5
 """
 
-from collections import defaultdict
+from collections import defaultdict, deque
 from typing import Dict, Iterator, List, Set, Tuple
 
 
@@ -40,18 +40,50 @@ def parse_input(test: bool = False) -> Tuple[Dict[int, Set[int]], List[List[int]
     return ordering, updates
 
 
-def verify_update(ordering: Dict[int, Set[int]], update: List[int]):
+def verify_update(ordering: Dict[int, Set[int]], update: List[int]) -> int:
     """Verify if an update is valid or not.
     A valid update adheres to the correct page order.
     """
+    positions = {page: i for i, page in enumerate(update)}
     for i, page in enumerate(update):
-        remaining = ordering[page]
-        after = update[i:]
-        if set(remaining) & set(after):
-            return 0
+        for before in ordering.get(page, ()):
+            if positions.get(before, -1) > i:
+                return 0
     return 1
 
 
+def fix_update(ordering: Dict[int, Set[int]], update: List[int]) -> List[int]:
+    """Sort an update to follow the page order.
+
+    This is a topological sort of only the rules between pages in the
+    update, so it works even if the full set of rules has cycles.
+
+    Raises:
+        ValueError: If the rules for the update contain a cycle.
+    """
+    pages = set(update)
+    following: Dict[int, List[int]] = defaultdict(list)
+    remaining = dict.fromkeys(update, 0)
+    for page in update:
+        for before in ordering.get(page, set()) & pages:
+            following[before].append(page)
+            remaining[page] += 1
+
+    queue = deque(page for page in update if not remaining[page])
+    result = []
+    while queue:
+        page = queue.popleft()
+        result.append(page)
+        for after in following[page]:
+            remaining[after] -= 1
+            if not remaining[after]:
+                queue.append(after)
+
+    if len(result) != len(update):
+        raise ValueError('page ordering rules contain a cycle')
+    return result
+
+
 def part_1(test: bool = False) -> int:
     """Count the middle pages of valid inputs."""
     ordering, updates = parse_input(test)
@@ -63,26 +95,7 @@ def part_2(test: bool = False) -> int:
     """Count the middle pages of fixed invalid inputs."""
     ordering, updates = parse_input(test)
     invalid = [update for update in updates if not verify_update(ordering, update)]
-
-    total = 0
-    for update in invalid:
-        size = len(update)
-
-        # Keep iterating over the full update until no fixes are made
-        while True:
-            for i in range(1, size):
-                current_page = update[i]
-                previous_page = update[i - 1]
-
-                # If the current page is not valid, swap it with the previous page
-                valid_pages = ordering[current_page]
-                if previous_page not in valid_pages:
-                    update = update[:i - 1] + [current_page, previous_page] + update[i + 1:]
-                    break
-            else:
-                break
-        total += update[size // 2]
-    return total
+    return sum(fix_update(ordering, update)[len(update) // 2] for update in invalid)
 
 
 def test_part_1() -> None:
@@ -95,6 +108,15 @@ def test_part_2() -> None:
     assert part_2(test=True) == 123
 
 
+def test_fix_update() -> None:
+    """Check fixed updates are valid."""
+    ordering, updates = parse_input(True)
+    for update in updates:
+        fixed = fix_update(ordering, update)
+        assert sorted(fixed) == sorted(update)
+        assert verify_update(ordering, fixed)
+
+
 if __name__ == '__main__':
     test_part_1()
     print(f'Part 1: {part_1()}')